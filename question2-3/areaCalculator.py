@@ -0,0 +1,653 @@
+# %% [markdown]
+# Reusable area calculator
+#
+# question2.py keeps its settings and intermediate results (start_x, weight,
+# points, all_y_in_x, ...) in module globals set by its __main__ block, so its
+# functions cannot run twice with different settings in one process. The
+# AreaCalculator owns one geometry instead, and keeps the work that does not
+# depend on the vertical lines (normalized arrays, edge index, bounding box,
+# reference area) between calls.
+#
+
+# %%
+import math
+import threading
+
+import numpy as np
+
+from geometryMetrics import polygon_area
+from geojsonCache import geometry_to_arrays, load_rings_cached, read_feature_geometry
+from instrumentation import count, stage
+from integrationsMethods import result_I_trapezoid_and_Simpson_with_y_list
+from projection import project_coordinates
+from simplification import simplify_rings
+from scanlineIntersections import (
+    EdgeIndex,
+    calculate_total_distances,
+    csr_to_all_y_in_x,
+)
+
+# %% [markdown]
+# Convergence order
+#
+
+
+# %%
+def observed_order(coarse: float, middle: float, fine: float) -> float | None:
+    """
+    Observed convergence order of three results with the step halved each
+    time, p = log2(|middle - coarse| / |fine - middle|); None when a
+    difference is zero.
+    """
+    if fine == middle or middle == coarse:
+        return None
+    return math.log2(abs(middle - coarse) / abs(fine - middle))
+
+
+# %% [markdown]
+# Calculator
+#
+
+
+# %%
+class AreaCalculator:
+    """
+    Area of one geometry by vertical lines and numerical integration.
+
+    The coordinates never change after construction. Everything derived from
+    them is computed on first use and cached behind a lock: the normalized
+    x, y arrays and the EdgeIndex for each (offset_x, offset_y, weight), and
+    the reference area. area() and intersections() only build the vertical
+    lines and query the index, so repeated calls with other steps or offsets
+    reuse that work, and calls from several threads are safe.
+
+    Parameters:
+    -----------
+    coordinates : array-like
+        (points x 2) projected coordinates in metres, every ring in order
+    ring_offsets : list or array-like, optional
+        Start of each ring plus the final end (default: a single ring)
+    offset_x : float, optional
+        X offset subtracted before scaling (default: centre of the bounding box)
+    offset_y : float, optional
+        Y offset subtracted before scaling (default: centre of the bounding box)
+    weight : float, optional
+        Scaling factor of the normalized coordinates (default: 1e4)
+
+    Examples:
+    ---------
+    >>> calculator = AreaCalculator.from_geojson("sergipeEPSG31983.geojson")
+    >>> calculator.area(step_x=0.5)
+    >>> calculator.area(step_x=0.25)          # same edge index, new lines only
+    """
+
+    def __init__(
+        self, coordinates, ring_offsets=None, offset_x=None, offset_y=None, weight=1e4
+    ):
+        # a private copy, freezing the caller's array would make it read-only
+        coordinates = np.array(coordinates, dtype=float)
+        coordinates.flags.writeable = False
+        self.coordinates = coordinates
+        if ring_offsets is None:
+            ring_offsets = [0, len(coordinates)]
+        self.ring_offsets = [int(offset) for offset in ring_offsets]
+
+        low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+        self.bounding_box = (low[0], low[1], high[0], high[1])
+        self.offset_x = (low[0] + high[0]) / 2 if offset_x is None else offset_x
+        self.offset_y = (low[1] + high[1]) / 2 if offset_y is None else offset_y
+        self.weight = weight
+
+        self._lock = threading.Lock()
+        self._normalized = {}
+        self._indexes = {}
+        self._reference_area = None
+
+    @classmethod
+    def from_geojson(
+        cls, path, feature_index=0, project=None, use_cache=True, **settings
+    ):
+        """
+        Build a calculator from every ring of one GeoJSON feature.
+
+        project=None projects WGS84 lon/lat files (such as sergipe.json) to
+        EPSG:31983 and keeps projected files as they are. The remaining
+        keyword arguments are passed to the constructor.
+        """
+        if use_cache:
+            coordinates, ring_offsets = load_rings_cached(path, feature_index)
+        else:
+            coordinates, ring_offsets = geometry_to_arrays(
+                read_feature_geometry(path, feature_index)
+            )
+        if project is None:
+            # lon/lat degrees cannot exceed 180 in absolute value, UTM metres do
+            project = bool(np.abs(coordinates).max() <= 180)
+        if project:
+            coordinates = project_coordinates(coordinates)
+        return cls(coordinates, ring_offsets, **settings)
+
+    @classmethod
+    def from_options(cls, options, use_cache=True):
+        """
+        Build a calculator from a question2.Options instance (file, feature,
+        offsets and weight).
+        """
+        return cls.from_geojson(
+            f"{options._file_name}.geojson",
+            options._feature_index,
+            use_cache=use_cache,
+            offset_x=options._offset_x,
+            offset_y=options._offset_y,
+            weight=options._weight,
+        )
+
+    # Cached geometry
+
+    def _settings(self, offset_x, offset_y, weight):
+        return (
+            self.offset_x if offset_x is None else offset_x,
+            self.offset_y if offset_y is None else offset_y,
+            self.weight if weight is None else weight,
+        )
+
+    def normalized(self, offset_x=None, offset_y=None, weight=None):
+        """
+        Normalized (x, y) arrays, (coordinate - offset) / weight, as
+        question2.normalize_coordinates computes them.
+        """
+        key = self._settings(offset_x, offset_y, weight)
+        with self._lock:
+            if key not in self._normalized:
+                offset_x, offset_y, weight = key
+                x = (self.coordinates[:, 0] - offset_x) / weight
+                y = (self.coordinates[:, 1] - offset_y) / weight
+                x.flags.writeable = False
+                y.flags.writeable = False
+                self._normalized[key] = (x, y)
+            return self._normalized[key]
+
+    def edge_index(self, offset_x=None, offset_y=None, weight=None):
+        """
+        EdgeIndex over the normalized edges, with the half-open crossing rule
+        so the pairing stays correct with several rings.
+        """
+        key = self._settings(offset_x, offset_y, weight)
+        x, y = self.normalized(*key)
+        with self._lock:
+            if key not in self._indexes:
+                self._indexes[key] = EdgeIndex(
+                    x, y, ring_offsets=self.ring_offsets, half_open=True
+                )
+            return self._indexes[key]
+
+    def reference_area(self) -> float:
+        """
+        Reference area in m² (geometryMetrics.polygon_area, even-odd
+        shoelace), computed once.
+        """
+        with self._lock:
+            if self._reference_area is None:
+                self._reference_area = polygon_area(self.coordinates, self.ring_offsets)
+            return self._reference_area
+
+    def simplified(self, max_area_m2):
+        """
+        New calculator without the vertices that change the area by less than
+        max_area_m2 each (simplification.simplify_rings on the coordinates in
+        metres), with the same offsets and weight.
+
+        Returns:
+        --------
+        tuple
+            (calculator, report) - report of simplify_rings, areas in m²
+        """
+        keep, ring_offsets, report = simplify_rings(
+            self.coordinates[:, 0],
+            self.coordinates[:, 1],
+            self.ring_offsets,
+            max_area_m2,
+        )
+        calculator = AreaCalculator(
+            self.coordinates[keep],
+            ring_offsets,
+            self.offset_x,
+            self.offset_y,
+            self.weight,
+        )
+        return calculator, report
+
+    # Vertical lines
+
+    def x_targets(
+        self,
+        step_x=0.5,
+        start_x=None,
+        end_x=None,
+        offset_x=None,
+        offset_y=None,
+        weight=None,
+    ):
+        """
+        X values of the vertical lines, on the same integer grid as
+        question2.generate_intersection_points (end_x excluded) when step_x
+        is a whole number of 1 / weight units, in steps of step_x from
+        start_x otherwise. Without start_x/end_x the lines are the multiples
+        of step_x from the first one at or left of the normalized bounding
+        box to the first one at or right of it.
+        """
+        if not step_x > 0:
+            raise ValueError("step_x must be positive")
+        offset_x, offset_y, weight = self._settings(offset_x, offset_y, weight)
+        if start_x is None or end_x is None:
+            x, _ = self.normalized(offset_x, offset_y, weight)
+            first = math.floor(x.min() / step_x)
+            last = math.ceil(x.max() / step_x)
+            if start_x is None and end_x is None:
+                return np.arange(first, last + 1) * step_x
+            if start_x is None:
+                start_x = first * step_x
+            if end_x is None:
+                end_x = (last + 1) * step_x
+
+        units = step_x * weight
+        if units >= 1 and math.isclose(units, round(units)):
+            x_range = range(int(start_x * weight), int(end_x * weight), round(units))
+            return np.array(x_range) / weight
+        n_lines = max(0, math.ceil((end_x - start_x) / step_x - 1e-9))
+        return start_x + np.arange(n_lines) * step_x
+
+    def intersections(
+        self,
+        step_x=0.5,
+        start_x=None,
+        end_x=None,
+        offset_x=None,
+        offset_y=None,
+        weight=None,
+    ):
+        """
+        Intersections of the vertical lines with the perimeter.
+
+        Returns:
+        --------
+        tuple
+            (x_targets, offsets, ys) - the lines and the CSR-style pair of
+            scanlineIntersections.intersect_scanlines
+        """
+        settings = self._settings(offset_x, offset_y, weight)
+        with stage("intersections"):
+            x_targets = self.x_targets(step_x, start_x, end_x, *settings)
+            offsets, ys = self.edge_index(*settings).ys_at_many(x_targets)
+            count("lines", len(x_targets))
+            count("intersections_found", len(ys))
+        return x_targets, offsets, ys
+
+    def all_y_in_x(self, step_x=0.5, **settings):
+        """
+        Intersections grouped by vertical line, in the all_y_in_x format of
+        question2.generate_intersection_points (e.g. for plot_state_visualization).
+        """
+        x_targets, offsets, ys = self.intersections(step_x, **settings)
+        return csr_to_all_y_in_x(x_targets.tolist(), offsets, ys)
+
+    def area(
+        self,
+        step_x=0.5,
+        start_x=None,
+        end_x=None,
+        offset_x=None,
+        offset_y=None,
+        weight=None,
+    ):
+        """
+        Area by the trapezoid and Simpson rules, as question2.area.
+
+        Returns:
+        --------
+        tuple
+            (area_m2_trapezoid, area_m2_Simpson, area_km2_trapezoid,
+            area_km2_Simpson, area_m2_reference, area_km2_reference)
+        """
+        weight = self._settings(offset_x, offset_y, weight)[2]
+        _, offsets, ys = self.intersections(
+            step_x, start_x, end_x, offset_x, offset_y, weight
+        )
+        with stage("calculate_total_distances"):
+            total_distances = calculate_total_distances(offsets, ys)
+        with stage("integration"):
+            I_trapezoid, I_Simpson, _ = result_I_trapezoid_and_Simpson_with_y_list(
+                total_distances, step_x
+            )
+            count("integrand_evaluations", len(total_distances))
+        area_m2_trapezoid = I_trapezoid * (weight**2)
+        area_m2_Simpson = I_Simpson * (weight**2)
+        with stage("reference_area"):
+            area_m2_reference = self.reference_area()
+        return (
+            area_m2_trapezoid,
+            area_m2_Simpson,
+            area_m2_trapezoid / 1e6,
+            area_m2_Simpson / 1e6,
+            area_m2_reference,
+            area_m2_reference / 1e6,
+        )
+
+    # Multi-resolution refinement
+
+    def refine(
+        self,
+        levels=5,
+        step_x=0.5,
+        start_x=None,
+        end_x=None,
+        tol=None,
+        offset_x=None,
+        offset_y=None,
+        weight=None,
+    ):
+        """
+        Convergence sweep with step_x, step_x / 2, step_x / 4, ...
+
+        Every level keeps the total crossing lengths of the previous one and
+        queries the edge index only for the new midlines, so the whole sweep
+        intersects as many lines as its finest level alone.
+
+        Parameters:
+        -----------
+        levels : int, optional
+            Maximum number of levels (default: 5)
+        step_x : float, optional
+            Step of the first level (default: 0.5)
+        start_x, end_x : float, optional
+            Range of the first level, as in x_targets
+        tol : float, optional
+            Stop when the Simpson area changes by less than tol km² between levels
+
+        Returns:
+        --------
+        tuple
+            (levels, x_targets, total_distances)
+            - levels: one dict per level with step_x, lines, new_lines,
+              area_km2_trapezoid, area_km2_Simpson, error_estimate_km2,
+              order_trapezoid and order_Simpson (observed_order of the last
+              three levels, None before the third)
+            - x_targets, total_distances: columns of the finest level
+        """
+        if levels < 1:
+            raise ValueError("levels must be at least 1")
+        settings = self._settings(offset_x, offset_y, weight)
+        index = self.edge_index(*settings)
+        to_km2 = settings[2] ** 2 / 1e6
+
+        x_targets = self.x_targets(step_x, start_x, end_x, *settings)
+        total_distances = calculate_total_distances(*index.ys_at_many(x_targets))
+        new_lines = len(x_targets)
+
+        results = []
+        for level in range(levels):
+            if level:
+                # only the midlines between the previous columns are new
+                midlines = (x_targets[:-1] + x_targets[1:]) / 2
+                new_totals = calculate_total_distances(*index.ys_at_many(midlines))
+                x_targets = _interleave(x_targets, midlines)
+                total_distances = _interleave(total_distances, new_totals)
+                new_lines = len(midlines)
+                step_x /= 2
+
+            I_trapezoid, I_Simpson, error_estimate = (
+                result_I_trapezoid_and_Simpson_with_y_list(total_distances, step_x)
+            )
+            result = {
+                "step_x": step_x,
+                "lines": len(x_targets),
+                "new_lines": new_lines,
+                "area_km2_trapezoid": I_trapezoid * to_km2,
+                "area_km2_Simpson": I_Simpson * to_km2,
+                "error_estimate_km2": error_estimate * to_km2,
+                "order_trapezoid": None,
+                "order_Simpson": None,
+            }
+            if len(results) >= 2:
+                for rule in ("trapezoid", "Simpson"):
+                    key = f"area_km2_{rule}"
+                    result[f"order_{rule}"] = observed_order(
+                        results[-2][key], results[-1][key], result[key]
+                    )
+            results.append(result)
+
+            if (
+                tol is not None
+                and level
+                and abs(result["area_km2_Simpson"] - results[-2]["area_km2_Simpson"])
+                < tol
+            ):
+                break
+        return results, x_targets, total_distances
+
+    # Adaptive scanline placement
+
+    def adaptive_area(
+        self,
+        tol=1.0,
+        step_x=0.5,
+        min_step=None,
+        max_vertices=4,
+        max_lines=100_000,
+        offset_x=None,
+        offset_y=None,
+        weight=None,
+    ):
+        """
+        Area with vertical lines placed where the border is complex.
+
+        The range of the geometry is split into panels of width step_x, and
+        each panel is sampled at 5 equally spaced lines. A panel is bisected
+        (2 new lines per half) while its error estimate exceeds its share of
+        tol (proportional to its width), so lines concentrate where the
+        crossing-length profile changes quickly. The profile is linear
+        between the x of consecutive vertices, so panels without a vertex
+        inside or on their ends are exact and never split; where there are
+        vertices it has kinks (and jumps at vertical edges) and Simpson only
+        converges as h^2 or h, so the estimate is |S(h/2) - S(h)| / 3
+        instead of the smooth-case / 15. With max_vertices, panels holding
+        more vertices are also bisected, following the edge density
+        directly. Panels with vertices are always bisected once, since 5
+        lines can alias a symmetric profile into a zero estimate. All new
+        lines of a round are intersected with one EdgeIndex query.
+
+        Vertical edges are jumps of the profile, so their x are added to the
+        initial panel ends. The half-open rule gives the profile to the
+        right of a line, so the last line of a panel that ends on a vertex
+        is taken just left of it; every jump is then between two panels,
+        never inside one. The area is the sum of the composite rules of the
+        panels.
+
+        Parameters:
+        -----------
+        tol : float, optional
+            Target error of the Simpson area in km² (default: 1.0)
+        step_x : float, optional
+            Width of the initial panels, normalized units (default: 0.5)
+        min_step : float, optional
+            Narrowest panel (default: step_x / 2^12)
+        max_vertices : int, optional
+            Bisect panels with more vertices than this; 5 lines cannot see
+            more kinks than a few, so the estimate alone misses them
+            (default: 4, None for no limit)
+        max_lines : int, optional
+            Stop refining once this many lines exist (default: 100,000)
+
+        Returns:
+        --------
+        dict
+            lines, area_km2_trapezoid, area_km2_Simpson, error_estimate_km2
+            (sum of the panel estimates), converged, x_targets and
+            total_distances
+        """
+        settings = self._settings(offset_x, offset_y, weight)
+        index = self.edge_index(*settings)
+        x, _ = self.normalized(*settings)
+        to_km2 = settings[2] ** 2 / 1e6
+        min_step = step_x / 2**12 if min_step is None else min_step
+        vertices_x = np.sort(x)
+        start, end = float(vertices_x[0]), float(vertices_x[-1])
+
+        def profile(x_targets):
+            return calculate_total_distances(*index.ys_at_many(x_targets))
+
+        def from_the_left(panel_x, panel_y):
+            # profile at the panel ends just left of the vertices they touch
+            ends = panel_x[:, -1]
+            on_vertex = np.searchsorted(vertices_x, ends, side="left") < (
+                np.searchsorted(vertices_x, ends, side="right")
+            )
+            if on_vertex.any():
+                panel_y[on_vertex, -1] = profile(np.nextafter(ends[on_vertex], -np.inf))
+            return panel_y
+
+        # panels as rows of 5 lines (a, a + h/4, a + h/2, a + 3h/4, b)
+        n_panels = max(1, math.ceil((end - start) / step_x))
+        # vertical edges are jumps of the profile; they start as panel ends so
+        # no panel ever holds one inside
+        jumps = index.x1[index.x1 == index.x2]
+        edges = np.union1d(np.linspace(start, end, n_panels + 1), jumps)
+        n_panels = len(edges) - 1
+        panel_x = edges[:-1, None] + np.diff(edges)[:, None] * np.linspace(0, 1, 5)
+        panel_x[:, -1] = edges[1:]
+        panel_y = from_the_left(
+            panel_x, profile(panel_x.ravel()).reshape(panel_x.shape)
+        )
+        lines = 4 * n_panels + 1
+
+        tol_per_width = tol / to_km2 / (end - start)
+        finished_x, finished_y = [], []
+        I_trapezoid = I_Simpson = error = 0.0
+        first_round = True
+        while len(panel_x):
+            width = panel_x[:, -1] - panel_x[:, 0]
+            coarse = width / 6 * (panel_y[:, 0] + 4 * panel_y[:, 2] + panel_y[:, 4])
+            fine = (
+                width
+                / 12
+                * (
+                    panel_y[:, 0]
+                    + 4 * panel_y[:, 1]
+                    + 2 * panel_y[:, 2]
+                    + 4 * panel_y[:, 3]
+                    + panel_y[:, 4]
+                )
+            )
+            trapezoid = (
+                width
+                / 8
+                * (
+                    panel_y[:, 0]
+                    + 2 * (panel_y[:, 1] + panel_y[:, 2] + panel_y[:, 3])
+                    + panel_y[:, 4]
+                )
+            )
+            # vertices inside each panel or on its ends; without any the
+            # profile is linear there and both rules are exact
+            vertices = np.searchsorted(
+                vertices_x, panel_x[:, -1], side="right"
+            ) - np.searchsorted(vertices_x, panel_x[:, 0], side="left")
+            panel_error = np.where(vertices > 0, np.abs(fine - coarse) / 3, 0.0)
+            split = panel_error > tol_per_width * width
+            # 5 lines can alias a symmetric profile (equal samples, zero
+            # estimate), so panels with vertices are bisected at least once
+            if first_round:
+                split |= vertices > 0
+                first_round = False
+            if max_vertices is not None:
+                split |= vertices > max_vertices
+            split &= width / 2 >= min_step
+            if lines + 4 * split.sum() > max_lines:
+                split[:] = False
+
+            finished_x.append(panel_x[~split])
+            finished_y.append(panel_y[~split])
+            I_trapezoid += math.fsum(trapezoid[~split])
+            I_Simpson += math.fsum(fine[~split])
+            error += float(panel_error[~split].sum())
+
+            # halves keep 3 of the parent's lines and get 2 new quarter lines each
+            parent_x, parent_y = panel_x[split], panel_y[split]
+            panel_x = np.concatenate(
+                (_bisect(parent_x, (0, 1, 2)), _bisect(parent_x, (2, 3, 4)))
+            )
+            known_y = np.concatenate((parent_y[:, 0:3], parent_y[:, 2:5]))
+            new_y = profile(panel_x[:, 1::2].ravel()).reshape(-1, 2)
+            panel_y = np.column_stack(
+                (known_y[:, 0], new_y[:, 0], known_y[:, 1], new_y[:, 1], known_y[:, 2])
+            )
+            # the left halves end on their parent's middle line
+            left_halves = slice(0, len(parent_x))
+            panel_y[left_halves] = from_the_left(
+                panel_x[left_halves], panel_y[left_halves]
+            )
+            lines += 2 * len(panel_x)
+
+        # panels share their end lines; order them and drop the duplicates
+        # (keeping the value to the right of each line)
+        all_x = np.concatenate(finished_x)
+        order = np.argsort(all_x[:, 0])
+        x_targets = np.append(all_x[order, :4].ravel(), all_x[order[-1], 4])
+        total_distances = np.append(
+            np.concatenate(finished_y)[order, :4].ravel(),
+            np.concatenate(finished_y)[order[-1], 4],
+        )
+        return {
+            "lines": len(x_targets),
+            "area_km2_trapezoid": I_trapezoid * to_km2,
+            "area_km2_Simpson": I_Simpson * to_km2,
+            "error_estimate_km2": error * to_km2,
+            "converged": error * to_km2 <= tol,
+            "x_targets": x_targets,
+            "total_distances": total_distances,
+        }
+
+
+def _bisect(panel_x: np.ndarray, columns: tuple) -> np.ndarray:
+    # 5 lines of a half panel: the parent's lines at columns plus the midpoints
+    left, middle, right = (panel_x[:, column] for column in columns)
+    return np.column_stack(
+        (left, (left + middle) / 2, middle, (middle + right) / 2, right)
+    )
+
+
+def _interleave(coarse: np.ndarray, middle: np.ndarray) -> np.ndarray:
+    merged = np.empty(len(coarse) + len(middle), dtype=np.result_type(coarse, middle))
+    merged[::2] = coarse
+    merged[1::2] = middle
+    return merged
+
+
+if __name__ == "__main__":
+    calculator = AreaCalculator.from_geojson("sergipeEPSG31983.geojson")
+    levels, _, _ = calculator.refine(levels=6)
+    print(f"Reference: {calculator.reference_area() / 1e6:,.2f} km²")
+    for level in levels:
+        print(
+            f"step_x={level['step_x']:<9} lines={level['lines']:<5} "
+            f"(+{level['new_lines']:<4}) "
+            f"trapezoid={level['area_km2_trapezoid']:,.2f} km² "
+            f"Simpson={level['area_km2_Simpson']:,.2f} km² "
+            f"p_trapezoid={level['order_trapezoid']} p_Simpson={level['order_Simpson']}"
+        )
+
+    simple, report = calculator.simplified(max_area_m2=1e5)
+    print(
+        f"simplified (1e5 m² per vertex): {report['vertices_removed']} of "
+        f"{report['vertices_before']} vertices removed, area delta "
+        f"{report['area_delta'] / 1e6:+.3f} km², "
+        f"Simpson={simple.area()[3]:,.2f} km² (was {calculator.area()[3]:,.2f} km²)"
+    )
+
+    adaptive = calculator.adaptive_area(tol=1.0)
+    print(
+        f"adaptive: lines={adaptive['lines']} "
+        f"trapezoid={adaptive['area_km2_trapezoid']:,.2f} km² "
+        f"Simpson={adaptive['area_km2_Simpson']:,.2f} km² "
+        f"estimated error={adaptive['error_estimate_km2']:.3f} km²"
+    )
@@ -0,0 +1,292 @@
+# %% [markdown]
+# Batch area calculation for many States / features
+#
+# Runs load -> normalize -> intersect -> integrate for every entry in a
+# process pool and writes one CSV or JSON table (chosen by the extension of
+# --output) with the trapezoid, Simpson and reference areas and their errors.
+#
+# Usage (from this folder):
+#
+#   python batchAreas.py sergipeEPSG31983.geojson amazonasEPSG31983.geojson -o areas.csv
+#   python batchAreas.py amazonas.json:0 --step-x 0.25 -o areas.json
+#   python batchAreas.py --settings states.json -o areas.csv --workers 4
+#   python batchAreas.py --settings states.json --figures figures --figure-format svg
+#
+# The settings file is a JSON list with one object per entry:
+#
+#   {"name": "sergipe", "file": "sergipeEPSG31983.geojson", "feature_index": 0,
+#    "offset_x": 1.34e6, "offset_y": 8.82e6, "weight": 1e4,
+#    "start_x": -10, "end_x": 10.5, "step_x": 0.5, "area_oficial_km2": 21910,
+#    "simplify_max_area_m2": 1e5}
+#
+# Only "file" is required. Without offsets the geometry is centred on its
+# bounding box, without start_x/end_x the vertical lines cover the whole
+# bounding box, and WGS84 lon/lat files (such as sergipe.json) are projected
+# to EPSG:31983 with projection.py unless "project" says otherwise. With
+# simplify_max_area_m2 the perimeter is simplified first (simplification.py).
+#
+
+# %%
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from areaCalculator import AreaCalculator
+from integrationsMethods import result_I_trapezoid_and_Simpson_with_y_list
+from scanlineIntersections import calculate_total_distances
+
+DEFAULT_SETTINGS = {
+    "feature_index": 0,
+    "weight": 1e4,
+    "step_x": 0.5,
+    "area_oficial_km2": None,
+    "project": None,
+    "simplify_max_area_m2": None,
+    "figures": None,
+    "figure_format": "png",
+}
+
+COLUMNS = [
+    "name",
+    "file",
+    "feature_index",
+    "rings",
+    "vertices",
+    "vertices_removed",
+    "simplification_area_delta_km2",
+    "lines",
+    "area_km2_trapezoid",
+    "area_km2_Simpson",
+    "area_km2_reference",
+    "area_km2_oficial",
+    "error_estimate_km2",
+    "error_km2_trapezoid",
+    "error_km2_Simpson",
+    "relative_error_trapezoid",
+    "relative_error_Simpson",
+    "error_oficial_km2_trapezoid",
+    "error_oficial_km2_Simpson",
+    "error_oficial_km2_reference",
+    "figure",
+]
+
+# %% [markdown]
+# Settings
+#
+
+
+# %%
+def parse_entry(entry: str) -> dict:
+    """
+    Turn a command line entry "file" or "file:feature_index" into settings.
+    """
+    path, _, feature_index = entry.rpartition(":")
+    if not path or not feature_index.isdigit():
+        path, feature_index = entry, 0
+    return {"file": path, "feature_index": int(feature_index)}
+
+
+def resolve_settings(entry: dict, overrides: dict) -> dict:
+    """
+    Complete the settings of one entry with the command line overrides and
+    the defaults.
+    """
+    settings = {**DEFAULT_SETTINGS, **entry}
+    settings.update(
+        {key: value for key, value in overrides.items() if value is not None}
+    )
+    settings.setdefault(
+        "name",
+        f"{os.path.splitext(os.path.basename(settings['file']))[0]}"
+        f"[{settings['feature_index']}]",
+    )
+    return settings
+
+
+# %% [markdown]
+# Pipeline
+#
+
+
+# %%
+def calculate_area(settings: dict) -> dict:
+    """
+    Run the whole pipeline for one entry and return its row of the table.
+    """
+    calculator = AreaCalculator.from_geojson(
+        settings["file"],
+        settings["feature_index"],
+        project=settings["project"],
+        offset_x=settings.get("offset_x"),
+        offset_y=settings.get("offset_y"),
+        weight=settings["weight"],
+    )
+    vertices = len(calculator.coordinates)
+    simplification = {"vertices_removed": 0, "area_delta": 0.0}
+    if settings["simplify_max_area_m2"]:
+        calculator, simplification = calculator.simplified(
+            settings["simplify_max_area_m2"]
+        )
+    step_x = settings["step_x"]
+    x_targets, offsets, ys = calculator.intersections(
+        step_x, settings.get("start_x"), settings.get("end_x")
+    )
+    I_trapezoid, I_Simpson, error_estimate = result_I_trapezoid_and_Simpson_with_y_list(
+        calculate_total_distances(offsets, ys), step_x
+    )
+    to_km2 = settings["weight"] ** 2 / 1e6
+    area_km2_trapezoid = I_trapezoid * to_km2
+    area_km2_Simpson = I_Simpson * to_km2
+    area_km2_reference = calculator.reference_area() / 1e6
+
+    area_km2_oficial = settings["area_oficial_km2"]
+
+    figure = None
+    if settings["figures"]:
+        figure = render_figure(calculator, x_targets, offsets, ys, settings)
+
+    def error_oficial(area_km2):
+        return None if area_km2_oficial is None else abs(area_km2 - area_km2_oficial)
+
+    return {
+        "name": settings["name"],
+        "file": settings["file"],
+        "feature_index": settings["feature_index"],
+        "rings": len(calculator.ring_offsets) - 1,
+        "vertices": vertices,
+        "vertices_removed": simplification["vertices_removed"],
+        "simplification_area_delta_km2": simplification["area_delta"] / 1e6,
+        "lines": len(x_targets),
+        "area_km2_trapezoid": area_km2_trapezoid,
+        "area_km2_Simpson": area_km2_Simpson,
+        "area_km2_reference": area_km2_reference,
+        "area_km2_oficial": area_km2_oficial,
+        "error_estimate_km2": error_estimate * to_km2,
+        "error_km2_trapezoid": abs(area_km2_trapezoid - area_km2_reference),
+        "error_km2_Simpson": abs(area_km2_Simpson - area_km2_reference),
+        "relative_error_trapezoid": abs(area_km2_trapezoid - area_km2_reference)
+        / area_km2_reference
+        * 100,
+        "relative_error_Simpson": abs(area_km2_Simpson - area_km2_reference)
+        / area_km2_reference
+        * 100,
+        "error_oficial_km2_trapezoid": error_oficial(area_km2_trapezoid),
+        "error_oficial_km2_Simpson": error_oficial(area_km2_Simpson),
+        "error_oficial_km2_reference": error_oficial(area_km2_reference),
+        "figure": figure,
+    }
+
+
+def render_figure(calculator, x_targets, offsets, ys, settings) -> str:
+    """
+    Render the normalized perimeter and the scanlines of one entry to
+    <figures>/<name>.<figure_format> with stateRendering (Agg, no display).
+    """
+    # imported here so runs without --figures never load matplotlib
+    from stateRendering import render_state
+
+    os.makedirs(settings["figures"], exist_ok=True)
+    path = os.path.join(
+        settings["figures"], f"{settings['name']}.{settings['figure_format']}"
+    )
+    x, y = calculator.normalized()
+    render_state(
+        path,
+        x,
+        y,
+        np.repeat(x_targets, np.diff(offsets)),
+        ys,
+        calculator.ring_offsets,
+        title=settings["name"],
+    )
+    return path
+
+
+def calculate_areas(
+    settings_list: list[dict], workers: int | None = None
+) -> list[dict]:
+    """
+    Run calculate_area for every entry in a process pool; rows keep the input order.
+    """
+    if workers == 1 or len(settings_list) == 1:
+        return [calculate_area(settings) for settings in settings_list]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(calculate_area, settings_list))
+
+
+# %% [markdown]
+# Output
+#
+
+
+# %%
+def write_table(rows: list[dict], path: str):
+    """
+    Write the rows as JSON when path ends with .json, as CSV otherwise
+    (path "-" writes CSV to the standard output).
+    """
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+        return
+
+    f = sys.stdout if path == "-" else open(path, "w", newline="")
+    try:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Calculate the area of many States / features in parallel"
+    )
+    parser.add_argument(
+        "entries", nargs="*", help='GeoJSON files, optionally "file:feature_index"'
+    )
+    parser.add_argument("--settings", help="JSON list with per-entry settings")
+    parser.add_argument(
+        "-o", "--output", default="-", help=".csv or .json (default: CSV on stdout)"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--weight", type=float, default=None)
+    parser.add_argument("--step-x", type=float, default=None)
+    parser.add_argument("--figures", help="folder for one figure per entry")
+    parser.add_argument("--figure-format", choices=("png", "svg"), default=None)
+    parser.add_argument(
+        "--simplify",
+        type=float,
+        default=None,
+        help="largest area change per removed vertex in m²",
+    )
+    args = parser.parse_args(argv)
+
+    entries = [parse_entry(entry) for entry in args.entries]
+    if args.settings:
+        with open(args.settings) as f:
+            entries.extend(json.load(f))
+    if not entries:
+        parser.error("no GeoJSON files or --settings given")
+
+    overrides = {
+        "weight": args.weight,
+        "step_x": args.step_x,
+        "simplify_max_area_m2": args.simplify,
+        "figures": args.figures,
+        "figure_format": args.figure_format,
+    }
+    settings_list = [resolve_settings(entry, overrides) for entry in entries]
+    write_table(calculate_areas(settings_list, args.workers), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+# %% [markdown]
+# Benchmark of the integration rules and of the area pipeline
+#
+# Usage (from this folder):
+#
+#   python benchmark.py                          # run and print the report
+#   python benchmark.py --quick                  # n up to 10^5 only
+#   python benchmark.py --save-baseline          # store the timings in benchmark_baseline.json
+#   python benchmark.py --compare                # flag regressions against the stored baseline
+#
+# Every run also imports question2.py in a fresh interpreter and fails when
+# the compute-only import exceeds IMPORT_BUDGET_S or loads matplotlib/shapely.
+#
+
+# %%
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import integrationsMethods
+import question2
+from areaCalculator import AreaCalculator
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# cases below these values are too noisy to be compared
+MIN_REFERENCE = {"wall_s": 1e-3, "peak_mb": 1.0}
+
+# compute-only `import question2` (numpy included): about 0.07 s here, 0.41 s
+# when matplotlib.pyplot and shapely were imported at module top
+IMPORT_BUDGET_S = 0.2
+# modules that only plotting and the reference area may load
+DEFERRED_MODULES = ("matplotlib", "shapely")
+
+# per-state settings, same values as the Options class / __main__ block of question2.py
+STATES = {
+    "sergipe": {
+        "file_name": "sergipeEPSG31983",
+        "offset_x": 1.34e6,
+        "offset_y": 8.82e6,
+        "weight": 1e4,
+    },
+    "amazonas": {
+        "file_name": "amazonasEPSG31983",
+        "offset_x": -1.75e6,
+        "offset_y": 0.95e7,
+        "weight": 1e5,
+    },
+}
+
+# %% [markdown]
+# Measurement
+#
+
+
+# %%
+def measure(function, repeats: int = 3) -> tuple[float, float]:
+    """
+    Time a callable and record its peak memory.
+
+    Parameters:
+    -----------
+    function : callable
+        Function without arguments to benchmark
+    repeats : int, optional
+        Number of timed runs, the best one is kept (default: 3)
+
+    Returns:
+    --------
+    tuple
+        (wall_s, peak_mb) - best wall time in seconds and peak traced memory in MB
+    """
+    wall = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        wall = min(wall, time.perf_counter() - start)
+
+    # separate run so tracemalloc does not slow down the timed ones
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return wall, peak / 1e6
+
+
+def configure_state(state: str):
+    """
+    Set the module globals question2.py reads (normally unpacked by its __main__ block).
+    """
+    options = question2.Options()
+    settings = STATES[state]
+    options.set_offset(settings["offset_x"], settings["offset_y"], settings["weight"])
+    options._state_name = state
+    options._file_name = settings["file_name"]
+    (
+        question2.state_name,
+        question2.file_name,
+        question2.feature_index,
+        question2.geometry_path,
+        question2.offset_x,
+        question2.offset_y,
+        question2.weight,
+        question2.start_x,
+        question2.end_x,
+        question2.step_x,
+        question2.figsize,
+        question2.linewidth,
+        question2.line_color,
+        question2.point_color,
+        question2.point_size,
+        question2.major_tick_spacing,
+        question2.minor_tick_spacing,
+        question2.show_intersection_points,
+        question2.area_oficial_km2,
+    ) = options.get()
+
+
+# %% [markdown]
+# Cases
+#
+
+
+# %%
+def integration_cases(max_exponent: int):
+    """
+    Yield (name, function, evaluations) for the integration rules.
+    """
+    for exponent in range(2, max_exponent + 1):
+        n = 10**exponent
+        interval = (0, 1, 1 / n)
+        for rule in ("trapezoid", "Simpson"):
+            expression_rule = getattr(
+                integrationsMethods, f"result_I_{rule}_with_expression"
+            )
+            for integrand in (integrationsMethods.func, integrationsMethods.func_array):
+                yield (
+                    f"{rule}_with_expression[{integrand.__name__}, n=1e{exponent}]",
+                    lambda rule=expression_rule, f=integrand, i=interval, w=n: rule(
+                        f, i, weight=w
+                    ),
+                    n + 1,
+                )
+
+        y_list = list(np.random.default_rng(exponent).random(n + 1))
+        for rule in ("trapezoid", "Simpson"):
+            y_list_rule = getattr(integrationsMethods, f"result_I_{rule}_with_y_list")
+            yield (
+                f"{rule}_with_y_list[n=1e{exponent}]",
+                lambda rule=y_list_rule, y=y_list, h=1 / n: rule(y, h),
+                n + 1,
+            )
+
+
+def pipeline_cases(state: str):
+    """
+    Yield (name, function, work) for the intersection and area steps of one state.
+    Work is the number of line x segment tests, or None.
+    """
+    configure_state(state)
+    question2.points = question2.load_geojson_coordinates()
+    question2.x, question2.y = question2.normalize_coordinates(question2.points)
+    x, y = question2.x, question2.y
+    segments = len(x) - 1
+    lines = len(np.arange(question2.start_x, question2.end_x, question2.step_x))
+
+    yield (
+        f"find_all_y_for_x[{state}]",
+        lambda: question2.find_all_y_for_x(0.0, x, y),
+        segments,
+    )
+    for engine in ("scan", "sweep", "numpy"):
+        yield (
+            f"generate_intersection_points[{state}, {engine}]",
+            lambda engine=engine: question2.generate_intersection_points(
+                x, y, engine=engine
+            ),
+            segments * lines,
+        )
+
+    def end_to_end():
+        # same steps as the __main__ block of question2.py
+        question2.points, ring_offsets = question2.load_geojson_rings()
+        question2.x, question2.y = question2.normalize_coordinates(question2.points)
+        _, _, _, question2.all_y_in_x = question2.generate_intersection_points(
+            question2.x, question2.y, engine="sweep", ring_offsets=ring_offsets
+        )
+        return question2.area(ring_offsets)
+
+    yield f"area[{state}]", end_to_end, None
+
+    calculator = AreaCalculator.from_geojson(
+        f"{question2.file_name}.geojson",
+        offset_x=question2.offset_x,
+        offset_y=question2.offset_y,
+        weight=question2.weight,
+    )
+    yield (
+        f"AreaCalculator.refine[{state}, 5 levels]",
+        lambda: calculator.refine(
+            5, question2.step_x, question2.start_x, question2.end_x
+        ),
+        None,
+    )
+    yield (
+        f"AreaCalculator.adaptive_area[{state}, tol=1 km²]",
+        lambda: calculator.adaptive_area(tol=1.0),
+        None,
+    )
+
+
+# %% [markdown]
+# Report and baseline
+#
+
+
+# %%
+def run(max_exponent: int, repeats: int) -> dict:
+    """
+    Run every case and return {name: {"wall_s", "per_second", "peak_mb"}}.
+    """
+    cases = list(integration_cases(max_exponent))
+    results = {}
+    for name, function, work in cases:
+        results[name] = _record(function, work, repeats)
+        _print_row(name, results[name])
+    for state in STATES:
+        # the pipeline cases read module globals, so configure and run one state at a time
+        for name, function, work in pipeline_cases(state):
+            results[name] = _record(function, work, repeats)
+            _print_row(name, results[name])
+    return results
+
+
+def measure_import(module: str = "question2", repeats: int = 5):
+    """
+    Time `import module` in fresh interpreters, the best run is kept.
+
+    Returns:
+    --------
+    tuple
+        (wall_s, loaded) - import time in seconds and the DEFERRED_MODULES
+        that the import loaded
+    """
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "wall = time.perf_counter() - start\n"
+        f"loaded = [m for m in {DEFERRED_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps([wall, loaded]))\n"
+    )
+    wall, loaded = float("inf"), []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        ).stdout
+        run_wall, loaded = json.loads(output)
+        wall = min(wall, run_wall)
+    return wall, loaded
+
+
+def _record(function, work, repeats) -> dict:
+    wall, peak = measure(function, repeats)
+    return {
+        "wall_s": wall,
+        "per_second": work / wall if work and wall else None,
+        "peak_mb": peak,
+    }
+
+
+def _print_row(name: str, result: dict):
+    per_second = result["per_second"]
+    per_second = f"{per_second:14,.0f}/s" if per_second else " " * 16
+    print(
+        f"{name:55s} {result['wall_s'] * 1e3:11.3f} ms {per_second} {result['peak_mb']:9.2f} MB"
+    )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Return the cases whose wall time or peak memory grew more than tolerance
+    (relative) over the baseline, ignoring baselines under MIN_REFERENCE.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ("wall_s", "peak_mb"):
+            reference = baseline[name][key]
+            if reference < MIN_REFERENCE[key]:
+                continue
+            if result[key] > reference * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {reference:.6g} -> {result[key]:.6g} "
+                    f"(+{(result[key] / reference - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the integration rules and the area pipeline"
+    )
+    parser.add_argument("--quick", action="store_true", help="n up to 10^5 only")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="relative slowdown accepted before flagging a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_BUDGET_S,
+        help=f"seconds allowed for the compute-only import (default: {IMPORT_BUDGET_S})",
+    )
+    args = parser.parse_args(argv)
+
+    # question2.py opens the GeoJSON files relative to the current folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    results = run(5 if args.quick else 7, args.repeats)
+
+    import_wall, loaded = measure_import()
+    results["import question2[compute-only]"] = {
+        "wall_s": import_wall,
+        "per_second": None,
+        "peak_mb": 0.0,
+    }
+    _print_row(
+        "import question2[compute-only]", results["import question2[compute-only]"]
+    )
+    over_budget = import_wall > args.import_budget or loaded
+    if over_budget:
+        print(
+            f"\nImport budget exceeded: {import_wall * 1e3:.1f} ms "
+            f"(budget {args.import_budget * 1e3:.0f} ms), loaded {loaded or 'nothing deferred'}"
+        )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against the baseline")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
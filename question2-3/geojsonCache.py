@@ -0,0 +1,239 @@
+# %% [markdown]
+# GeoJSON ingestion with a binary coordinate cache
+#
+# The first run on a file streams the features array up to the selected
+# feature and stores its coordinates next to the file, in .geojson_cache/, as
+# two .npy arrays keyed by the SHA-256 of the source file:
+#
+# - <name>.f<feature>.<hash>.coords.npy: float64 (points x 2), every ring in order
+# - <name>.f<feature>.<hash>.rings.npy: ring offsets, ring r is
+#   coords[offsets[r]:offsets[r + 1]]
+#
+# Later runs memory-map the arrays without parsing any JSON. Editing the
+# GeoJSON changes its hash, so a stale cache is never used. The hash is
+# remembered in <name>.hash.json with the size and modification time of the
+# file, and only computed again when one of them changes.
+#
+
+# %%
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+CACHE_DIR = ".geojson_cache"
+
+_FEATURES = re.compile(r'"features"\s*:\s*\[')
+
+# %% [markdown]
+# Incremental feature parsing
+#
+
+
+# %%
+def iter_features(path: str, chunk_size: int = 1 << 20):
+    """
+    Yield the features of a FeatureCollection one at a time.
+
+    The file is read in chunks of chunk_size characters and every feature is
+    decoded with json.JSONDecoder.raw_decode as soon as it is complete, so
+    only the current feature and the unread part of the current chunk are
+    held in memory, and a caller that stops iterating never reads the rest
+    of the file.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the GeoJSON file
+    chunk_size : int, optional
+        Characters read at a time (default: 1 MiB); a feature longer than
+        that is read in doubling chunks
+
+    Yields:
+    -------
+    dict
+        GeoJSON feature
+    """
+    decoder = json.JSONDecoder()
+    with open(path) as f:
+        text = ""
+        position = None
+        while position is None:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError(f"{path} is not a GeoJSON FeatureCollection")
+            # keep a tail, the key may be split between two chunks
+            text = text[-64:] + chunk
+            match = _FEATURES.search(text)
+            if match is not None:
+                position = match.end()
+
+        end_of_file = False
+        while True:
+            position = _skip_separators(text, position)
+            if position == len(text):
+                if end_of_file:
+                    raise ValueError(f"{path} ends inside the features array")
+                text, position = f.read(chunk_size), 0
+                end_of_file = not text
+                continue
+            if text[position] == "]":
+                return
+            try:
+                feature, position = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise
+                # incomplete feature: drop what was decoded, read more
+                chunk = f.read(max(chunk_size, len(text) - position))
+                end_of_file = not chunk
+                text, position = text[position:] + chunk, 0
+                continue
+            yield feature
+
+
+def read_feature_geometry(path: str, feature_index: int = 0) -> dict:
+    """
+    Decode the geometry of one feature of a FeatureCollection.
+
+    The features are decoded one at a time by iter_features and reading
+    stops at the selected one, so the following features are never read.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the GeoJSON file
+    feature_index : int, optional
+        Index of the feature to extract (default: 0)
+
+    Returns:
+    --------
+    dict
+        GeoJSON geometry of the feature
+    """
+    features = 0
+    for features, feature in enumerate(iter_features(path), start=1):
+        if features - 1 == feature_index:
+            return feature["geometry"]
+    raise IndexError(f"{path} has only {features} features")
+
+
+def _skip_separators(text: str, position: int) -> int:
+    while position < len(text) and text[position] in " \t\r\n,":
+        position += 1
+    return position
+
+
+def geometry_to_arrays(geometry: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten every ring of a Polygon or MultiPolygon into contiguous arrays.
+
+    Returns:
+    --------
+    tuple
+        (coords, ring_offsets) - float64 (points x 2) array and the start of
+        each ring plus the final end
+    """
+    polygons = geometry["coordinates"]
+    if geometry["type"] == "Polygon":
+        polygons = [polygons]
+    rings = [
+        np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon
+    ]
+
+    ring_offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    np.cumsum([len(ring) for ring in rings], out=ring_offsets[1:])
+    coords = np.concatenate(rings) if rings else np.zeros((0, 2))
+    return coords, ring_offsets
+
+
+# %% [markdown]
+# Cache
+#
+
+
+# %%
+def file_hash(path: str) -> str:
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cached_file_hash(path: str, cache_dir: str) -> str:
+    """
+    file_hash of path, reused from <name>.hash.json in cache_dir while the
+    size and modification time of the file are unchanged.
+    """
+    status = os.stat(path)
+    key = {"size": status.st_size, "mtime_ns": status.st_mtime_ns}
+    index_path = os.path.join(cache_dir, f"{os.path.basename(path)}.hash.json")
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if {name: index.get(name) for name in key} == key:
+            return index["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = file_hash(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{index_path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({**key, "sha256": digest}, f)
+    os.replace(temporary, index_path)
+    return digest
+
+
+def cache_paths(path: str, feature_index: int = 0, cache_dir: str | None = None):
+    """
+    Paths of the (coords, ring offsets) cache files of a feature.
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    cache_dir = cache_dir or os.path.join(folder, CACHE_DIR)
+    digest = cached_file_hash(path, cache_dir)
+    stem = f"{os.path.splitext(name)[0]}.f{feature_index}.{digest[:16]}"
+    return (
+        os.path.join(cache_dir, f"{stem}.coords.npy"),
+        os.path.join(cache_dir, f"{stem}.rings.npy"),
+    )
+
+
+def load_rings_cached(
+    path: str, feature_index: int = 0, cache_dir: str | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Coordinates of every ring of a feature, from the binary cache when possible.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the GeoJSON file
+    feature_index : int, optional
+        Index of the feature to extract (default: 0)
+    cache_dir : str, optional
+        Folder of the cache files (default: .geojson_cache next to the file)
+
+    Returns:
+    --------
+    tuple
+        (coords, ring_offsets) - read-only memory-mapped float64 (points x 2)
+        array and the ring offsets, as geometry_to_arrays returns
+    """
+    coords_path, rings_path = cache_paths(path, feature_index, cache_dir)
+    if not (os.path.exists(coords_path) and os.path.exists(rings_path)):
+        coords, ring_offsets = geometry_to_arrays(
+            read_feature_geometry(path, feature_index)
+        )
+        os.makedirs(os.path.dirname(coords_path), exist_ok=True)
+        # write to temporary names first so a concurrent run never sees half a file
+        for target, array in ((coords_path, coords), (rings_path, ring_offsets)):
+            temporary = f"{target}.{os.getpid()}.tmp.npy"
+            np.save(temporary, array)
+            os.replace(temporary, target)
+
+    return np.load(coords_path, mmap_mode="r"), np.load(rings_path)
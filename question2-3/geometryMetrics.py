@@ -0,0 +1,232 @@
+# %% [markdown]
+# Geometry metrics with NumPy (shoelace formula)
+#
+# Area, perimeter, centroid and bounding box of a Polygon or MultiPolygon
+# stored as contiguous arrays: a (points x 2) coordinate array with every
+# ring in order and the ring offsets of geojsonCache.geometry_to_arrays.
+#
+# By Green's theorem the signed area of a ring is
+# A = 1/2 * sum(x_i * y_(i+1) - x_(i+1) * y_i), positive for counter-clockwise
+# rings, and its centroid is sum((x_i + x_(i+1)) * term_i) / (6A). Every sum
+# runs in one vectorized pass over all rings. Rings may or may not repeat
+# their first vertex at the end; the closing term of a repeated vertex is zero.
+# The coordinates are shifted to the first vertex before the products, so UTM
+# values of millions of metres do not cancel each other's significant digits.
+#
+# The area of the geometry combines the rings by the even-odd rule, as the
+# scanline pairing and question2.area do: a ring inside an odd number of
+# other rings (a hole, or an island in a lake of an island...) is subtracted.
+# Shapely is only used by shapely_area, as an optional cross-check.
+#
+
+# %%
+import numpy as np
+
+from scanlineIntersections import EdgeIndex
+
+# %% [markdown]
+# Per-ring sums
+#
+
+
+# %%
+def _rings(coordinates, ring_offsets):
+    coordinates = np.asarray(coordinates, dtype=float)
+    if ring_offsets is None:
+        ring_offsets = [0, len(coordinates)]
+    ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+    # empty rings contribute nothing
+    starts, ends = ring_offsets[:-1], ring_offsets[1:]
+    non_empty = ends > starts
+    return coordinates, starts[non_empty], ends[non_empty]
+
+
+def _next_index(n_points: int, starts, ends) -> np.ndarray:
+    # following vertex of each vertex, wrapping around inside its own ring
+    following = np.arange(1, n_points + 1)
+    following[ends - 1] = starts
+    return following
+
+
+def ring_signed_areas(coordinates, ring_offsets=None) -> np.ndarray:
+    """
+    Signed area of every ring, positive when counter-clockwise.
+
+    Parameters:
+    -----------
+    coordinates : array-like
+        (points x 2) coordinates, every ring in order
+    ring_offsets : list or array-like, optional
+        Start of each ring plus the final end (default: a single ring)
+
+    Returns:
+    --------
+    np.ndarray
+        One signed area per non-empty ring
+    """
+    coordinates, starts, ends = _rings(coordinates, ring_offsets)
+    if not len(starts):
+        return np.zeros(0)
+    x, y = (coordinates - coordinates[0]).T
+    following = _next_index(len(coordinates), starts, ends)
+    terms = x * y[following] - x[following] * y
+    return np.add.reduceat(terms, starts) / 2
+
+
+def ring_depths(coordinates, ring_offsets=None) -> np.ndarray:
+    """
+    Number of other rings that contain each ring, tested with the first
+    vertex of the ring (even-odd point in polygon). Rings are assumed not to
+    cross each other, as in valid GeoJSON.
+
+    Only the rings whose bounding box contains a test point are scanned for
+    it, so disjoint rings (an archipelago, the municipalities of a State)
+    cost one vectorized bounding-box pass instead of a scan of every vertex
+    per ring. A ring that does hold other test points casts their rays
+    through an EdgeIndex over its edges with x and y swapped (a horizontal
+    ray is a vertical line there), so only the edges near each ray are
+    tested.
+    """
+    coordinates, starts, ends = _rings(coordinates, ring_offsets)
+    depths = np.zeros(len(starts), dtype=np.int64)
+    if len(starts) < 2:
+        return depths
+
+    x, y = coordinates[:, 0], coordinates[:, 1]
+    px, py = x[starts], y[starts]
+    x_min, x_max = np.minimum.reduceat(x, starts), np.maximum.reduceat(x, starts)
+    y_min, y_max = np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+    # test points inside the x-range of each ring's bounding box
+    order = np.argsort(px, kind="stable")
+    sorted_px = px[order]
+    low = np.searchsorted(sorted_px, x_min, side="left")
+    high = np.searchsorted(sorted_px, x_max, side="right")
+    # every ring holds its own first vertex; skip the rings that hold no other
+    for ring in np.flatnonzero(high - low > 1):
+        points = order[low[ring] : high[ring]]
+        points = points[
+            (points != ring) & (py[points] >= y_min[ring]) & (py[points] <= y_max[ring])
+        ]
+        if not len(points):
+            continue
+        # the ring closed on its first vertex, with x and y swapped
+        vertices = np.append(np.arange(starts[ring], ends[ring]), starts[ring])
+        index = EdgeIndex(y[vertices], x[vertices], half_open=True)
+        offsets, x_cross = index.ys_at_many(py[points])
+        # crossings of the ray from each point to +infinity
+        ray = np.repeat(np.arange(len(points)), np.diff(offsets))
+        crossings = np.bincount(
+            ray, weights=x_cross > px[points][ray], minlength=len(points)
+        )
+        depths[points] += crossings.astype(np.int64) % 2
+    return depths
+
+
+# %% [markdown]
+# Metrics
+#
+
+
+# %%
+def geometry_metrics(coordinates, ring_offsets=None) -> dict:
+    """
+    Area, perimeter, centroid and bounding box of a multi-ring geometry.
+
+    Parameters:
+    -----------
+    coordinates : array-like
+        (points x 2) coordinates, every ring in order
+    ring_offsets : list or array-like, optional
+        Start of each ring plus the final end (default: a single ring)
+
+    Returns:
+    --------
+    dict
+        - area: even-odd area of the rings (holes subtracted)
+        - signed_area: sum of the signed ring areas
+        - ring_areas: signed area of each ring
+        - perimeter: total length of every ring
+        - centroid: (x, y) of the even-odd area
+        - bounding_box: (min_x, min_y, max_x, max_y)
+    """
+    coordinates, starts, ends = _rings(coordinates, ring_offsets)
+    if not len(starts):
+        raise ValueError("The geometry has no coordinates")
+    origin = coordinates[0]
+    x, y = (coordinates - origin).T
+    following = _next_index(len(coordinates), starts, ends)
+    x_next, y_next = x[following], y[following]
+
+    terms = x * y_next - x_next * y
+    ring_areas = np.add.reduceat(terms, starts) / 2
+    ring_moments_x = np.add.reduceat((x + x_next) * terms, starts) / 6
+    ring_moments_y = np.add.reduceat((y + y_next) * terms, starts) / 6
+    lengths = np.hypot(x_next - x, y_next - y)
+
+    # |A| with the sign of the even-odd rule; the moments follow the area sign
+    signs = np.where(ring_depths(coordinates, ring_offsets) % 2, -1.0, 1.0)
+    orientation = np.sign(ring_areas)
+    area = float(np.sum(signs * np.abs(ring_areas)))
+    moment_x = float(np.sum(signs * orientation * ring_moments_x))
+    moment_y = float(np.sum(signs * orientation * ring_moments_y))
+    centroid = (np.nan, np.nan)
+    if area:
+        centroid = (origin[0] + moment_x / area, origin[1] + moment_y / area)
+
+    low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+    return {
+        "area": area,
+        "signed_area": float(ring_areas.sum()),
+        "ring_areas": ring_areas,
+        "perimeter": float(lengths.sum()),
+        "centroid": centroid,
+        "bounding_box": (float(low[0]), float(low[1]), float(high[0]), float(high[1])),
+    }
+
+
+def polygon_area(coordinates, ring_offsets=None) -> float:
+    """
+    Even-odd area of the rings, the reference area of question2.area.
+    """
+    ring_areas = np.abs(ring_signed_areas(coordinates, ring_offsets))
+    if len(ring_areas) < 2:
+        return float(ring_areas.sum())
+    signs = np.where(ring_depths(coordinates, ring_offsets) % 2, -1.0, 1.0)
+    return float(np.sum(signs * ring_areas))
+
+
+# %% [markdown]
+# Shapely cross-check (optional)
+#
+
+
+# %%
+def shapely_area(coordinates, ring_offsets=None) -> float:
+    """
+    Shapely area of the even-odd combination of the rings, to cross-check
+    polygon_area. Needs shapely, which is imported only here.
+    """
+    from functools import reduce
+
+    from shapely import Polygon
+
+    coordinates, starts, ends = _rings(coordinates, ring_offsets)
+    rings = [Polygon(coordinates[start:end]) for start, end in zip(starts, ends)]
+    return reduce(lambda a, b: a.symmetric_difference(b), rings).area
+
+
+if __name__ == "__main__":
+    from geojsonCache import load_rings_cached
+
+    for file_name in ("sergipeEPSG31983.geojson", "amazonasEPSG31983.geojson"):
+        coordinates, ring_offsets = load_rings_cached(file_name)
+        metrics = geometry_metrics(coordinates, ring_offsets)
+        print(file_name)
+        print(f"  Área (laço):    {metrics['area'] / 1e6:,.6f} km²")
+        print(
+            f"  Área (Shapely): {shapely_area(coordinates, ring_offsets) / 1e6:,.6f} km²"
+        )
+        print(f"  Perímetro:      {metrics['perimeter'] / 1e3:,.3f} km")
+        print(f"  Centroide:      {metrics['centroid']}")
+        print(f"  Caixa:          {metrics['bounding_box']}")
@@ -0,0 +1,205 @@
+# %% [markdown]
+# Opt-in per-stage instrumentation of the area pipeline
+#
+# The pipeline functions are marked with @instrumented (a stage named after
+# the function) or `with stage("name"):`, and report work with
+# count("segments_tested", n). Nothing is recorded unless a Recorder is
+# active; then every call of a stage adds its wall time, its peak traced
+# memory (Recorder(memory=True)) and the counters reported while it was the
+# innermost stage.
+#
+#   with Recorder(memory=True) as recorder:
+#       ...                                    # run the pipeline
+#   recorder.to_json("report.json")
+#
+# Counters used by the pipeline: lines, segments_tested, intersections_found
+# and integrand_evaluations.
+#
+# Disabled, a stage costs one ContextVar lookup and a branch per call. The
+# recorder is per context, so threads and worker processes started inside a
+# recording are not recorded.
+#
+
+# %%
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+_recorder = ContextVar("recorder", default=None)
+_DISABLED = nullcontext()
+
+# %% [markdown]
+# Recorder
+#
+
+
+# %%
+class Recorder:
+    """
+    Collects the stages and counters of the runs made while it is active.
+
+    Parameters:
+    -----------
+    memory : bool, optional
+        Trace the peak memory of every stage with tracemalloc, which slows
+        Python allocations down (default: False)
+    callback : callable, optional
+        Called as callback(event) when a stage call ends, event being a dict
+        with stage, wall_s, peak_mb (or None) and counters of that call
+
+    Examples:
+    ---------
+    >>> with Recorder(callback=print) as recorder:
+    ...     calculator.area(step_x=0.1)
+    >>> recorder.report()["stages"]["intersections"]["wall_s"]
+    """
+
+    def __init__(self, memory: bool = False, callback=None):
+        self.memory = memory
+        self.callback = callback
+        self.stages = {}
+        self.counters = {}
+        self._stack = []
+        self._token = None
+        self._started_tracemalloc = False
+        self._wall_start = None
+        self.wall_s = 0.0
+
+    def start(self):
+        """Activate the recorder in the current context; returns self."""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _recorder.set(self)
+        self._wall_start = time.perf_counter()
+        return self
+
+    def stop(self):
+        """Deactivate the recorder; returns self."""
+        self.wall_s += time.perf_counter() - self._wall_start
+        _recorder.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Stages and counters
+
+    @contextmanager
+    def stage(self, name: str):
+        frame = {"counters": {}, "peak": 0, "base": 0}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent["peak"] = max(parent["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["base"] = frame["peak"] = current
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            self._stack.pop()
+            peak_mb = None
+            if self.memory:
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                peak_mb = (peak - frame["base"]) / 1e6
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent["peak"] = max(parent["peak"], peak)
+            self._add(name, wall, peak_mb, frame["counters"])
+
+    def count(self, counter: str, value: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+        if self._stack:
+            counters = self._stack[-1]["counters"]
+            counters[counter] = counters.get(counter, 0) + value
+
+    def _add(self, name, wall, peak_mb, counters):
+        record = self.stages.setdefault(
+            name, {"calls": 0, "wall_s": 0.0, "peak_mb": None, "counters": {}}
+        )
+        record["calls"] += 1
+        record["wall_s"] += wall
+        if peak_mb is not None:
+            record["peak_mb"] = max(record["peak_mb"] or 0.0, peak_mb)
+        for counter, value in counters.items():
+            record["counters"][counter] = record["counters"].get(counter, 0) + value
+        if self.callback is not None:
+            self.callback(
+                {
+                    "stage": name,
+                    "wall_s": wall,
+                    "peak_mb": peak_mb,
+                    "counters": dict(counters),
+                }
+            )
+
+    # Report
+
+    def report(self) -> dict:
+        """
+        Returns:
+        --------
+        dict
+            wall_s (time the recorder was active), stages (per stage: calls,
+            total wall_s, largest peak_mb and counters, in first-call order)
+            and counters (totals of the whole recording)
+        """
+        return {
+            "wall_s": self.wall_s,
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def to_json(self, path: str):
+        """Write report() as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+# %% [markdown]
+# Hooks used by the pipeline
+#
+
+
+# %%
+def stage(name: str):
+    """Context manager recording a stage, a no-op without an active Recorder."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return _DISABLED
+    return recorder.stage(name)
+
+
+def count(counter: str, value: int = 1):
+    """Add value to a counter of the active Recorder, if any."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.count(counter, value)
+
+
+def instrumented(function):
+    """Record every call of function as a stage named after it."""
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder.get()
+        if recorder is None:
+            return function(*args, **kwargs)
+        with recorder.stage(name):
+            return function(*args, **kwargs)
+
+    return wrapper
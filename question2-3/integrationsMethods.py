@@ -1,6 +1,10 @@
 # %%
 import math
-from functools import reduce
+from functools import lru_cache, reduce
+
+import numpy as np
+
+from instrumentation import count
 
 DECIMAL_HOUSES = 6
 
@@ -38,6 +42,11 @@ def func(x):
     return (math.exp(-(x**2))) / (math.cos(x) + 2)
 
 
+# same integrand written with numpy so it can be evaluated on a whole grid at once
+def func_array(x):
+    return np.exp(-(x**2)) / (np.cos(x) + 2)
+
+
 # %%
 def _ensure_int(value, name: str) -> int:
     if isinstance(value, int):
@@ -47,6 +56,44 @@ def _ensure_int(value, name: str) -> int:
     raise TypeError(f"{name} must be an integer (got {type(value).__name__})")
 
 
+# %% [markdown]
+# Avaliação vetorizada (NumPy)
+
+
+# %%
+def _evaluate_on_grid(expression, nodes: np.ndarray):
+    """
+    Evaluate expression on every node with a single call.
+
+    Returns None when the callable cannot take a NumPy array (e.g. it uses
+    math.* functions), so the caller can fall back to the scalar path.
+    """
+    try:
+        values = np.asarray(expression(nodes), dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if values.shape != nodes.shape:
+        return None
+    count("integrand_evaluations", len(nodes))
+    return values
+
+
+def _trapezoid_weights(n_nodes: int) -> np.ndarray:
+    # 1, 2, 2, ..., 2, 1
+    weights = np.full(n_nodes, 2.0)
+    weights[0] = weights[-1] = 1.0
+    return weights
+
+
+def _Simpson_weights(n_nodes: int) -> np.ndarray:
+    # 1, 4, 2, 4, ..., 2, 4, 1 (same multipliers as the reduce version)
+    weights = np.where(np.arange(n_nodes) % 2, 4.0, 2.0)
+    weights[0] = 1.0
+    if (n_nodes - 1) % 2 == 0:
+        weights[-1] = 1.0
+    return weights
+
+
 # %% [markdown]
 # Regra do Trapézio - Resultado
 
@@ -56,6 +103,7 @@ def result_I_trapezoid_with_expression(
     expression: object,
     interval: tuple,
     weight: int = 10000,
+    vectorized: bool | None = None,
 ) -> float:
     if not callable(expression):
         raise TypeError("Expression must be callable")
@@ -66,22 +114,35 @@ def result_I_trapezoid_with_expression(
     start = _ensure_int(start, "start")
     end = _ensure_int(end, "end")
     step = _ensure_int(step, "step")
-    # sample interior points (normalized by weight)
 
+    # array mode: evaluate the whole grid at once and apply the weights with a dot product
+    # (vectorized=None tries it and falls back to the scalar loop, False skips it)
+    if vectorized is not False:
+        nodes = np.concatenate(([start], np.arange(start + step, end, step), [end]))
+        y = _evaluate_on_grid(expression, nodes / weight)
+        if y is not None:
+            return I_trapezoid(
+                step / weight, float(np.dot(_trapezoid_weights(len(y)), y))
+            )
+        if vectorized:
+            raise TypeError("Expression does not accept NumPy arrays")
+
+    # sample interior points (normalized by weight)
     y = [expression(x / weight) for x in range(start + step, end, step)]
     y = list(map(lambda x: x * 2, y))
     # include endpoints
     y.insert(0, expression(start / weight))
     y.append(expression(end / weight))
+    count("integrand_evaluations", len(y))
     return I_trapezoid(step / weight, sum(y))
 
 
 # Regra dos Trapézios resultado
 def result_I_trapezoid_with_y_list(y_list: list, h: int) -> float:
     scaled_y_values = [value * 2 for value in y_list]
-    # include endpoints
-    scaled_y_values.append(y_list[0])
-    scaled_y_values.append(y_list[-1])
+    # the endpoints are weighted once, not twice
+    scaled_y_values.append(-y_list[0])
+    scaled_y_values.append(-y_list[-1])
     return I_trapezoid(h, sum(scaled_y_values))
 
 
@@ -100,6 +161,7 @@ def result_I_Simpson_with_expression(
     expression: object,
     interval: tuple,
     weight: int = 10000,
+    vectorized: bool | None = None,
 ) -> float:
     if not callable(expression):
         raise TypeError("Expression must be callable")
@@ -110,6 +172,16 @@ def result_I_Simpson_with_expression(
     start = _ensure_int(start, "start")
     end = _ensure_int(end, "end")
     step = _ensure_int(step, "step")
+
+    # array mode (see result_I_trapezoid_with_expression)
+    if vectorized is not False:
+        nodes = np.arange(start, end + step, step)
+        y = _evaluate_on_grid(expression, nodes / weight)
+        if y is not None:
+            return I_Simpson(step / weight, float(np.dot(_Simpson_weights(len(y)), y)))
+        if vectorized:
+            raise TypeError("Expression does not accept NumPy arrays")
+
     intervals = list(range(start, end + step, step))
 
     def new_value(acc, item):
@@ -122,6 +194,7 @@ def result_I_Simpson_with_expression(
         return acc + expression(value / weight) * multiplier
 
     total = reduce(new_value, enumerate(intervals), 0)
+    count("integrand_evaluations", len(intervals))
     # include endpoints
     return I_Simpson(step / weight, total)
 
@@ -201,3 +274,769 @@ if __name__ == "__main__":
     print("Ordem de convergência p trapezoid: ", p_trapezoid)
 
 # %%
+# %% [markdown]
+# Simpson Adaptativo
+
+
+# %%
+def _Simpson_corrected(a, b, f):
+    # Richardson-corrected Simpson of [a, b] from the values at its quarters
+    m = (a + b) / 2
+    left = (m - a) / 6 * (f[0] + 4 * f[1] + f[2])
+    right = (b - m) / 6 * (f[2] + 4 * f[3] + f[4])
+    whole = (b - a) / 6 * (f[0] + 4 * f[2] + f[4])
+    return left + right + (left + right - whole) / 15
+
+
+def result_I_adaptive_Simpson(
+    expression: object,
+    interval: tuple,
+    tol: float = 1e-10,
+    max_depth: int = 50,
+) -> tuple[float, float, int]:
+    """
+    Integrate expression over (a, b) with adaptive Simpson quadrature.
+
+    The value of a panel is the Richardson-corrected Simpson rule
+    S2 + (S2 - S1) / 15 of its two halves (S1: one panel, S2: two halves),
+    which is O(h^6). Its error is estimated the same way, from the corrected
+    values of the panel and of its two halves: |Q_halves - Q_panel| / 63.
+    Only the panels whose estimate exceeds their share of tol are split
+    again. Function values are reused, so every split costs exactly four
+    new evaluations.
+
+    Parameters:
+    -----------
+    expression : callable
+        Scalar integrand f(x)
+    interval : tuple
+        (a, b) integration limits
+    tol : float, optional
+        Absolute error target for the whole integral (default: 1e-10)
+    max_depth : int, optional
+        Maximum number of bisections of a panel (default: 50)
+
+    Returns:
+    --------
+    tuple
+        (value, error_estimate, evaluations) - error_estimate is the sum of
+        the estimates of the accepted panels
+    """
+    if not callable(expression):
+        raise TypeError("Expression must be callable")
+    if tol <= 0:
+        raise ValueError("tol must be positive")
+    a, b = interval[0], interval[1]
+
+    f = [expression(a + (b - a) * i / 4) for i in range(5)]
+    evaluations = 5
+
+    # stack of panels: (a, b, f at the 5 quarter points, corrected value, tol, depth)
+    stack = [(a, b, f, _Simpson_corrected(a, b, f), tol, 0)]
+    values = []
+    errors = []
+    while stack:
+        a, b, f, whole, panel_tol, depth = stack.pop()
+        m = (a + b) / 2
+        f_left = [
+            f[0],
+            expression((7 * a + b) / 8),
+            f[1],
+            expression((5 * a + 3 * b) / 8),
+            f[2],
+        ]
+        f_right = [
+            f[2],
+            expression((3 * a + 5 * b) / 8),
+            f[3],
+            expression((a + 7 * b) / 8),
+            f[4],
+        ]
+        evaluations += 4
+        left = _Simpson_corrected(a, m, f_left)
+        right = _Simpson_corrected(m, b, f_right)
+        delta = left + right - whole
+        if abs(delta) <= 63 * panel_tol or depth >= max_depth:
+            values.append(left + right)
+            errors.append(abs(delta) / 63)
+        else:
+            # push the right half first so panels are accepted left to right
+            stack.append((m, b, f_right, right, panel_tol / 2, depth + 1))
+            stack.append((a, m, f_left, left, panel_tol / 2, depth + 1))
+
+    count("integrand_evaluations", evaluations)
+    return math.fsum(values), math.fsum(errors), evaluations
+
+
+if __name__ == "__main__":
+    I_adaptive, error_adaptive, evaluations_adaptive = result_I_adaptive_Simpson(
+        func, (0, 1), tol=1e-10
+    )
+    print("Simpson adaptativo: ", round(I_adaptive, DECIMAL_HOUSES))
+    print("Erro estimado: ", error_adaptive)
+    print("Avaliações da função: ", evaluations_adaptive)
+
+# %% [markdown]
+# Extrapolação de Romberg (Richardson)
+
+
+# %%
+def _evaluate_nodes(expression, nodes: np.ndarray) -> np.ndarray:
+    # array call when possible, scalar loop otherwise
+    values = _evaluate_on_grid(expression, nodes)
+    if values is None:
+        values = np.array([expression(node) for node in nodes], dtype=float)
+        count("integrand_evaluations", len(nodes))
+    return values
+
+
+def result_I_Romberg(
+    expression: object,
+    interval: tuple,
+    levels: int = 6,
+    n: int = 1,
+    tol: float | None = None,
+) -> tuple[float, float | None, list[list[float]], int]:
+    """
+    Romberg integration built on nested trapezoid grids.
+
+    Each level doubles the number of subintervals and evaluates only the new
+    midpoints, T(2n) = T(n) / 2 + h * sum(f(midpoints)), so a level costs
+    O(new nodes). The trapezoid column is extrapolated with Richardson's
+    table R[k][j] = R[k][j-1] + (R[k][j-1] - R[k-1][j-1]) / (4^j - 1).
+
+    Parameters:
+    -----------
+    expression : callable
+        Integrand f(x); array-capable callables are evaluated per level in one call
+    interval : tuple
+        (a, b) integration limits
+    levels : int, optional
+        Maximum number of trapezoid levels (default: 6)
+    n : int, optional
+        Number of subintervals of the first level (default: 1)
+    tol : float, optional
+        Stop when two consecutive diagonal entries differ by less than tol
+
+    Returns:
+    --------
+    tuple
+        (value, p, table, evaluations)
+        - value: last diagonal entry of the Romberg table
+        - p: observed order of the trapezoid column, computed with calculate_p
+          from the last two levels against value (None with a single level)
+        - table: Romberg table, table[k][0] is the trapezoid rule with n * 2^k subintervals
+        - evaluations: number of integrand evaluations
+    """
+    if not callable(expression):
+        raise TypeError("Expression must be callable")
+    if levels < 1 or n < 1:
+        raise ValueError("levels and n must be at least 1")
+    a, b = interval[0], interval[1]
+
+    h = (b - a) / n
+    y = _evaluate_nodes(expression, np.linspace(a, b, n + 1))
+    evaluations = n + 1
+    table = [[I_trapezoid(h, float(np.dot(_trapezoid_weights(n + 1), y)))]]
+
+    for k in range(1, levels):
+        # only the midpoints of the previous grid are new
+        midpoints = a + h * (np.arange(n) + 0.5)
+        y_new = _evaluate_nodes(expression, midpoints)
+        evaluations += n
+        h /= 2
+        n *= 2
+        row = [table[-1][0] / 2 + h * math.fsum(y_new)]
+        for j in range(1, k + 1):
+            row.append(row[j - 1] + (row[j - 1] - table[-1][j - 1]) / (4**j - 1))
+        table.append(row)
+        if tol is not None and abs(row[-1] - table[-2][-1]) < tol:
+            break
+
+    value = table[-1][-1]
+    p = None
+    if len(table) > 1:
+        p = calculate_p(table[-1][0], table[-2][0], value)
+    return value, p, table, evaluations
+
+
+if __name__ == "__main__":
+    # n=50 and n=100 of the convergence study, sharing the n=50 evaluations
+    I_Romberg, p_Romberg, table_Romberg, evaluations_Romberg = result_I_Romberg(
+        func, (0, 1), levels=2, n=50
+    )
+    print("Romberg (50 -> 100 subintervalos): ", round(I_Romberg, DECIMAL_HOUSES))
+    print("Ordem de convergência p trapezoid (Romberg): ", p_Romberg)
+    print("Avaliações da função: ", evaluations_Romberg)
+
+# %% [markdown]
+# Trapézio e Simpson em uma única passada
+
+
+# %%
+def result_I_trapezoid_and_Simpson_with_y_list(
+    y_list, h: float
+) -> tuple[float, float, float]:
+    """
+    Apply the trapezoid and 1/3 Simpson rules to the same samples at once.
+
+    The samples are reduced into three partial sums (endpoints, odd and even
+    interior nodes) that both rules share, so no scaled copies are built.
+    Since S(h) = T(h) + (T(h) - T(2h)) / 3, the difference S - T is the
+    Richardson estimate of the trapezoid error.
+
+    Parameters:
+    -----------
+    y_list : list or array-like
+        Equally spaced samples y0, y1, ..., yn
+    h : float
+        Spacing between samples
+
+    Returns:
+    --------
+    tuple
+        (I_trapezoid, I_Simpson, error_estimate)
+    """
+    y = np.asarray(y_list, dtype=float)
+    if y.ndim != 1 or len(y) < 2:
+        raise ValueError("y_list must have at least two values")
+    last = len(y) - 1
+    ends = y[0] + y[last]
+    odd = y[1:last:2].sum()
+    even = y[2:last:2].sum()
+
+    trapezoid = I_trapezoid(h, float(ends + 2 * (odd + even)))
+    if last % 2 == 0:
+        Simpson = I_Simpson(h, float(ends + 4 * odd + 2 * even))
+    else:
+        # odd number of subintervals: same multipliers as result_I_Simpson_with_y_list
+        Simpson = I_Simpson(h, float(y[0] + 4 * (odd + y[last]) + 2 * even))
+    return trapezoid, Simpson, abs(Simpson - trapezoid)
+
+
+def result_I_trapezoid_and_Simpson_with_expression(
+    expression: object,
+    interval: tuple,
+    weight: int = 10000,
+) -> tuple[float, float, float]:
+    """
+    Evaluate expression once on the grid (a, b, h) and return
+    (I_trapezoid, I_Simpson, error_estimate), see
+    result_I_trapezoid_and_Simpson_with_y_list.
+    """
+    if not callable(expression):
+        raise TypeError("Expression must be callable")
+    start = _ensure_int(interval[0] * weight, "start")
+    end = _ensure_int(interval[1] * weight, "end")
+    step = _ensure_int(interval[2] * weight, "step")
+    if (end - start) % step:
+        raise ValueError("The interval must be a whole number of steps")
+
+    nodes = np.arange(start, end + step, step) / weight
+    y = _evaluate_nodes(expression, nodes)
+    return result_I_trapezoid_and_Simpson_with_y_list(y, step / weight)
+
+
+if __name__ == "__main__":
+    I_trapezoid_100, I_Simpson_100, error_100 = (
+        result_I_trapezoid_and_Simpson_with_expression(func, (0, 1, 1 / 100))
+    )
+    print("Trapézio (100 subintervalos): ", round(I_trapezoid_100, DECIMAL_HOUSES))
+    print("Simpson (100 subintervalos): ", round(I_Simpson_100, DECIMAL_HOUSES))
+    print("Erro estimado do trapézio: ", error_100)
+
+# %% [markdown]
+# Trapézio e Simpson com espaçamento não uniforme
+
+
+# %%
+def result_I_trapezoid_and_Simpson_nonuniform(
+    x_list, y_list
+) -> tuple[float, float, float]:
+    """
+    Trapezoid and Simpson rules for samples at arbitrary increasing x.
+
+    Simpson is applied to consecutive pairs of subintervals (h0, h1) with
+    the parabola through their three samples,
+    (h0 + h1) / 6 * ((2 - h1/h0) y0 + (h0 + h1)^2 / (h0 h1) y1 + (2 - h0/h1) y2),
+    which reduces to the 1/3 rule when h0 = h1. With an odd number of
+    subintervals the last one is integrated by the trapezoid rule.
+
+    Parameters:
+    -----------
+    x_list : list or array-like
+        Strictly increasing nodes x0, x1, ..., xn
+    y_list : list or array-like
+        Samples at the nodes
+
+    Returns:
+    --------
+    tuple
+        (I_trapezoid, I_Simpson, error_estimate)
+    """
+    x = np.asarray(x_list, dtype=float)
+    y = np.asarray(y_list, dtype=float)
+    if x.ndim != 1 or x.shape != y.shape or len(x) < 2:
+        raise ValueError("x_list and y_list must have the same length, at least two")
+    h = np.diff(x)
+    if np.any(h <= 0):
+        raise ValueError("x_list must be strictly increasing")
+
+    trapezoid_parts = h * (y[:-1] + y[1:]) / 2
+    trapezoid = math.fsum(trapezoid_parts)
+
+    pairs = len(h) // 2
+    h0, h1 = h[0 : 2 * pairs : 2], h[1 : 2 * pairs : 2]
+    y0, y1, y2 = (
+        y[0 : 2 * pairs : 2],
+        y[1 : 2 * pairs + 1 : 2],
+        y[2 : 2 * pairs + 1 : 2],
+    )
+    Simpson_parts = (
+        (h0 + h1)
+        / 6
+        * ((2 - h1 / h0) * y0 + (h0 + h1) ** 2 / (h0 * h1) * y1 + (2 - h0 / h1) * y2)
+    )
+    Simpson = math.fsum(Simpson_parts)
+    if len(h) % 2:
+        Simpson += float(trapezoid_parts[-1])
+    return trapezoid, Simpson, abs(Simpson - trapezoid)
+
+
+if __name__ == "__main__":
+    # nodes clustered near 0, where func varies fastest
+    nodes = np.linspace(0, 1, 101) ** 2
+    I_trapezoid_nu, I_Simpson_nu, error_nu = result_I_trapezoid_and_Simpson_nonuniform(
+        nodes, func_array(nodes)
+    )
+    print("Trapézio (nós não uniformes): ", round(I_trapezoid_nu, DECIMAL_HOUSES))
+    print("Simpson (nós não uniformes): ", round(I_Simpson_nu, DECIMAL_HOUSES))
+    print("Erro estimado do trapézio: ", error_nu)
+
+# %% [markdown]
+# Integração em lote (várias séries de amostras)
+
+
+# %%
+def _rule_sums(total, odd, first, last, lengths, h):
+    # trapezoid: 1, 2, ..., 2, 1 -> 2 * total - first - last
+    # Simpson: 1, 4, 2, ..., 4, 1 -> 2 * total + 2 * odd - first - last
+    # (an odd number of subintervals keeps 4 on the last node, as in the other Simpson helpers)
+    last_is_even = (lengths - 1) % 2 == 0
+    trapezoid = I_trapezoid(h, 2 * total - first - last)
+    Simpson = I_Simpson(
+        h, 2 * total + 2 * odd - first - np.where(last_is_even, last, 0)
+    )
+    return trapezoid, Simpson, np.abs(Simpson - trapezoid)
+
+
+def result_I_trapezoid_and_Simpson_batch(
+    y_matrix, h, lengths=None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Integrate many equally spaced sample series at once.
+
+    Parameters:
+    -----------
+    y_matrix : array-like
+        2-D array (series x samples), one series per row
+    h : float or array-like
+        Spacing shared by every row, or one spacing per row
+    lengths : array-like, optional
+        Number of valid samples of each row; the remaining samples of the row
+        are padding and ignored (default: every row uses all columns)
+
+    Returns:
+    --------
+    tuple
+        (I_trapezoid, I_Simpson, error_estimate), one value per row
+    """
+    y = np.asarray(y_matrix, dtype=float)
+    if y.ndim != 2:
+        raise ValueError("y_matrix must be a 2-D array (series x samples)")
+    n_rows, n_cols = y.shape
+    if lengths is None:
+        lengths = np.full(n_rows, n_cols)
+    else:
+        lengths = np.asarray(lengths, dtype=np.intp)
+        if lengths.shape != (n_rows,) or np.any(lengths > n_cols):
+            raise ValueError(
+                "lengths must give one length per row, at most the row size"
+            )
+        # zero the padding so it drops out of the sums
+        y = np.where(np.arange(n_cols) < lengths[:, None], y, 0.0)
+    if np.any(lengths < 2):
+        raise ValueError("Every series must have at least two values")
+
+    total = y.sum(axis=1)
+    odd = y[:, 1::2].sum(axis=1)
+    first = y[:, 0]
+    last = y[np.arange(n_rows), lengths - 1]
+    return _rule_sums(total, odd, first, last, lengths, np.asarray(h, dtype=float))
+
+
+def result_I_trapezoid_and_Simpson_ragged(
+    values, offsets, h
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Same as result_I_trapezoid_and_Simpson_batch for ragged series stored
+    back to back: series i is values[offsets[i]:offsets[i + 1]].
+
+    Parameters:
+    -----------
+    values : array-like
+        1-D array with the samples of every series
+    offsets : array-like
+        Start of each series in values plus the final end (len = series + 1)
+    h : float or array-like
+        Spacing shared by every series, or one spacing per series
+
+    Returns:
+    --------
+    tuple
+        (I_trapezoid, I_Simpson, error_estimate), one value per series
+    """
+    values = np.asarray(values, dtype=float)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    starts = offsets[:-1]
+    lengths = np.diff(offsets)
+    if np.any(lengths < 2):
+        raise ValueError("Every series must have at least two values")
+
+    # position of each sample inside its own series
+    local_index = np.arange(len(values)) - np.repeat(starts, lengths)
+    total = np.add.reduceat(values, starts)
+    odd = np.add.reduceat(np.where(local_index % 2, values, 0.0), starts)
+    first = values[starts]
+    last = values[offsets[1:] - 1]
+    return _rule_sums(total, odd, first, last, lengths, np.asarray(h, dtype=float))
+
+
+# %% [markdown]
+# Integração em fluxo (amostras de um iterador)
+
+
+# %%
+class _CompensatedSum:
+    """Kahan–Neumaier running sum."""
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value: float):
+        value = float(value)
+        t = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - t) + value
+        else:
+            self.compensation += (value - t) + self.total
+        self.total = t
+
+    def value(self) -> float:
+        return self.total + self.compensation
+
+
+class StreamingIntegrator:
+    """
+    Trapezoid and 1/3 Simpson rules over samples that arrive one by one or
+    in chunks, in O(1) memory.
+
+    Only the running sums both rules need are kept (all samples, odd-index
+    samples, first and last sample), with compensated summation so the
+    result stays accurate over 10^8+ samples.
+
+    Examples:
+    ---------
+    >>> integrator = StreamingIntegrator(h=0.01)
+    >>> for value in samples:
+    ...     integrator.push(value)
+    >>> I_trapezoid, I_Simpson, error = integrator.result()
+    """
+
+    def __init__(self, h: float):
+        self.h = h
+        self.count = 0
+        self._total = _CompensatedSum()
+        self._odd = _CompensatedSum()
+        self._first = 0.0
+        self._last = 0.0
+
+    def push(self, y: float):
+        if not self.count:
+            self._first = y
+        self._total.add(y)
+        if self.count % 2:
+            self._odd.add(y)
+        self._last = y
+        self.count += 1
+
+    def push_many(self, array):
+        chunk = np.asarray(array, dtype=float).ravel()
+        if not len(chunk):
+            return
+        if not self.count:
+            self._first = chunk[0]
+        # pairwise sum inside the chunk, compensated sum across chunks
+        self._total.add(chunk.sum())
+        self._odd.add(chunk[1 - self.count % 2 :: 2].sum())
+        self._last = chunk[-1]
+        self.count += len(chunk)
+
+    def result(self) -> tuple[float, float, float]:
+        """Return (I_trapezoid, I_Simpson, error_estimate) of the samples pushed so far."""
+        if self.count < 2:
+            raise ValueError("At least two samples are needed")
+        total = self._total.value()
+        odd = self._odd.value()
+        first, last = float(self._first), float(self._last)
+
+        trapezoid = I_trapezoid(self.h, 2 * total - first - last)
+        # an odd number of subintervals keeps 4 on the last node, as in the other Simpson helpers
+        last_weight = last if (self.count - 1) % 2 == 0 else 0.0
+        Simpson = I_Simpson(self.h, 2 * total + 2 * odd - first - last_weight)
+        return trapezoid, Simpson, abs(Simpson - trapezoid)
+
+
+# %% [markdown]
+# Integração paralela (pool de processos)
+
+
+# %%
+def _integrate_chunk(
+    expression, rule: str, a: float, b: float, n: int, i0: int, i1: int
+):
+    # composite rule over the nodes i0..i1 of the grid a + (b - a) * i / n
+    nodes = a + (b - a) * np.arange(i0, i1 + 1) / n
+    y = _evaluate_nodes(expression, nodes)
+    h = (b - a) / n
+    if rule == "trapezoid":
+        return I_trapezoid(h, float(np.dot(_trapezoid_weights(len(y)), y)))
+    return I_Simpson(h, float(np.dot(_Simpson_weights(len(y)), y)))
+
+
+def result_I_parallel_with_expression(
+    expression: object,
+    interval: tuple,
+    n: int,
+    rule: str = "Simpson",
+    workers: int | None = None,
+    chunk_size: int = 100_000,
+    serial_threshold: int = 200_000,
+) -> float:
+    """
+    Composite trapezoid or 1/3 Simpson rule with the chunks evaluated in a
+    process pool, for integrands that are expensive to call.
+
+    [a, b] is split into chunks of chunk_size subintervals (even for Simpson,
+    so each chunk is a complete composite rule and the weights of the shared
+    nodes add up to the global pattern). The partial sums are always combined
+    in chunk order, so the result only depends on chunk_size, never on the
+    number of workers.
+
+    Parameters:
+    -----------
+    expression : callable
+        Integrand; must be picklable (a module-level function) to be sent to the workers
+    interval : tuple
+        (a, b) integration limits
+    n : int
+        Number of subintervals (even for Simpson)
+    rule : str, optional
+        "trapezoid" or "Simpson" (default: "Simpson")
+    workers : int, optional
+        Number of worker processes (default: os.cpu_count())
+    chunk_size : int, optional
+        Subintervals per chunk (default: 100_000)
+    serial_threshold : int, optional
+        Below this n the chunks are evaluated in the current process (default: 200_000)
+
+    Returns:
+    --------
+    float
+        Value of the integral
+    """
+    if not callable(expression):
+        raise TypeError("Expression must be callable")
+    if rule not in ("trapezoid", "Simpson"):
+        raise ValueError('rule must be "trapezoid" or "Simpson"')
+    n = _ensure_int(n, "n")
+    if n < 1 or chunk_size < 1:
+        raise ValueError("n and chunk_size must be positive")
+    if rule == "Simpson":
+        if n % 2:
+            raise ValueError("Simpson's rule needs an even number of subintervals")
+        chunk_size += chunk_size % 2
+    a, b = interval[0], interval[1]
+
+    bounds = [(i0, min(i0 + chunk_size, n)) for i0 in range(0, n, chunk_size)]
+    arguments = [(expression, rule, a, b, n, i0, i1) for i0, i1 in bounds]
+
+    if n < serial_threshold or workers == 1 or len(bounds) == 1:
+        partials = [_integrate_chunk(*args) for args in arguments]
+    else:
+        # imported here, concurrent.futures.process is slow to import and only
+        # this function needs it
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map keeps the submission order
+            partials = list(executor.map(_integrate_chunk, *zip(*arguments)))
+        # the workers record nothing, count their evaluations here
+        count("integrand_evaluations", sum(i1 - i0 + 1 for i0, i1 in bounds))
+    return math.fsum(partials)
+
+
+if __name__ == "__main__":
+    I_parallel = result_I_parallel_with_expression(func_array, (0, 1), 10**6)
+    print("Simpson paralelo (10^6 subintervalos): ", round(I_parallel, DECIMAL_HOUSES))
+
+# %% [markdown]
+# Malha em ponto flutuante com n subintervalos
+
+
+# %%
+def _grid_chunks(interval: tuple, n: int, chunk_size: int):
+    # nodes a + (b - a) * i / n, i = 0..n, generated chunk by chunk
+    a, b = interval[0], interval[1]
+    for i0 in range(0, n + 1, chunk_size):
+        yield a + (b - a) * np.arange(i0, min(i0 + chunk_size, n + 1)) / n
+
+
+def _integrate_grid(expression, interval: tuple, n: int, chunk_size: int):
+    if not callable(expression):
+        raise TypeError("Expression must be callable")
+    n = _ensure_int(n, "n")
+    if n < 1 or chunk_size < 1:
+        raise ValueError("n and chunk_size must be positive")
+    integrator = StreamingIntegrator((interval[1] - interval[0]) / n)
+    for nodes in _grid_chunks(interval, n, chunk_size):
+        integrator.push_many(_evaluate_nodes(expression, nodes))
+    return integrator.result()
+
+
+def result_I_trapezoid_with_grid(
+    expression: object,
+    interval: tuple,
+    n: int,
+    chunk_size: int = 1_000_000,
+) -> float:
+    """
+    Trapezoid rule with n subintervals of (a, b), without the integer weight grid.
+
+    The nodes are generated and evaluated chunk_size at a time and fed to a
+    StreamingIntegrator, so memory stays bounded for any n (10^7-10^9) and
+    any step, not only multiples of 1 / weight.
+
+    Parameters:
+    -----------
+    expression : callable
+        Integrand; array-capable callables are evaluated one chunk per call
+    interval : tuple
+        (a, b) integration limits
+    n : int
+        Number of subintervals
+    chunk_size : int, optional
+        Nodes evaluated per chunk (default: 1_000_000)
+
+    Returns:
+    --------
+    float
+        Value of the integral
+    """
+    return _integrate_grid(expression, interval, n, chunk_size)[0]
+
+
+def result_I_Simpson_with_grid(
+    expression: object,
+    interval: tuple,
+    n: int,
+    chunk_size: int = 1_000_000,
+) -> float:
+    """
+    1/3 Simpson rule with n subintervals of (a, b), see result_I_trapezoid_with_grid.
+    """
+    return _integrate_grid(expression, interval, n, chunk_size)[1]
+
+
+if __name__ == "__main__":
+    I_grid_Simpson = result_I_Simpson_with_grid(func_array, (0, 1), 3 * 10**6)
+    print("Simpson (3·10^6 subintervalos): ", round(I_grid_Simpson, DECIMAL_HOUSES))
+
+# %% [markdown]
+# Quadratura de Gauss–Legendre
+
+
+# %%
+@lru_cache(maxsize=32)
+def _Gauss_Legendre_table(order: int) -> tuple[np.ndarray, np.ndarray]:
+    # nodes and weights on [-1, 1]; the root finding only runs once per order
+    nodes, weights = np.polynomial.legendre.leggauss(order)
+    # the cached arrays are shared between calls
+    nodes.flags.writeable = False
+    weights.flags.writeable = False
+    return nodes, weights
+
+
+def result_I_composite_Gauss_Legendre(
+    expression: object,
+    interval: tuple,
+    n: int = 1,
+    order: int = 10,
+) -> float:
+    """
+    Composite Gauss–Legendre quadrature: n equal panels with order points each.
+
+    The nodes of every panel are built at once as an (n x order) array, so an
+    array-capable integrand is evaluated in a single call. A rule with order
+    points is exact for polynomials up to degree 2 * order - 1.
+
+    Parameters:
+    -----------
+    expression : callable
+        Integrand f(x)
+    interval : tuple
+        (a, b) integration limits
+    n : int, optional
+        Number of panels (default: 1)
+    order : int, optional
+        Points per panel (default: 10)
+
+    Returns:
+    --------
+    float
+        Value of the integral
+    """
+    if not callable(expression):
+        raise TypeError("Expression must be callable")
+    n = _ensure_int(n, "n")
+    order = _ensure_int(order, "order")
+    if n < 1 or order < 1:
+        raise ValueError("n and order must be positive")
+    a, b = interval[0], interval[1]
+    x, w = _Gauss_Legendre_table(order)
+
+    # map [-1, 1] onto every panel
+    half = (b - a) / (2 * n)
+    midpoints = a + half * (2 * np.arange(n) + 1)
+    nodes = midpoints[:, None] + half * x[None, :]
+    y = _evaluate_nodes(expression, nodes.ravel()).reshape(n, order)
+    return half * float((y @ w).sum())
+
+
+def result_I_Gauss_Legendre(
+    expression: object,
+    interval: tuple,
+    order: int = 10,
+) -> float:
+    """
+    Gauss–Legendre quadrature with order points on (a, b), see
+    result_I_composite_Gauss_Legendre.
+    """
+    return result_I_composite_Gauss_Legendre(expression, interval, 1, order)
+
+
+if __name__ == "__main__":
+    for order in (5, 10, 20):
+        I_Gauss = result_I_Gauss_Legendre(func, (0, 1), order)
+        print(f"Gauss–Legendre ({order} pontos): ", I_Gauss)
@@ -0,0 +1,245 @@
+# %% [markdown]
+# WGS84 longitude/latitude (EPSG:4326) to UTM (EPSG:31983) projection
+#
+# In-process replacement for the ogr2ogr step of converterCommand:
+#
+#   python projection.py sergipe.json sergipeEPSG31983.geojson
+#
+# The transverse Mercator projection uses Krüger's series to sixth order in
+# the third flattening n (Karney, "Transverse Mercator with an accuracy of a
+# few nanometers", 2011), evaluated with NumPy over whole coordinate arrays.
+# EPSG:31983 is SIRGAS 2000 / UTM zone 23S on the GRS80 ellipsoid; like the
+# ogr2ogr conversion, no datum shift is applied between WGS84 and SIRGAS 2000.
+#
+# EPSG:4326: https://epsg.io/4326
+#
+# EPSG:31983: https://epsg.io/31983
+#
+
+# %%
+import argparse
+import json
+import math
+
+import numpy as np
+
+from geojsonCache import iter_features
+
+# GRS80
+SEMI_MAJOR_AXIS = 6378137.0
+FLATTENING = 1 / 298.257222101
+
+SCALE_FACTOR = 0.9996
+FALSE_EASTING = 500000.0
+FALSE_NORTHING_SOUTH = 10000000.0
+
+# %% [markdown]
+# Transverse Mercator coefficients
+#
+
+
+# %%
+def _Kruger_coefficients(flattening: float):
+    n = flattening / (2 - flattening)
+    rectifying_radius = (
+        SEMI_MAJOR_AXIS / (1 + n) * (1 + n**2 / 4 + n**4 / 64 + n**6 / 256)
+    )
+    alpha = np.array(
+        [
+            n / 2
+            - 2 * n**2 / 3
+            + 5 * n**3 / 16
+            + 41 * n**4 / 180
+            - 127 * n**5 / 288
+            + 7891 * n**6 / 37800,
+            13 * n**2 / 48
+            - 3 * n**3 / 5
+            + 557 * n**4 / 1440
+            + 281 * n**5 / 630
+            - 1983433 * n**6 / 1935360,
+            61 * n**3 / 240
+            - 103 * n**4 / 140
+            + 15061 * n**5 / 26880
+            + 167603 * n**6 / 181440,
+            49561 * n**4 / 161280 - 179 * n**5 / 168 + 6601661 * n**6 / 7257600,
+            34729 * n**5 / 80640 - 3418889 * n**6 / 1995840,
+            212378941 * n**6 / 319334400,
+        ]
+    )
+    return rectifying_radius, alpha
+
+
+_RECTIFYING_RADIUS, _ALPHA = _Kruger_coefficients(FLATTENING)
+_ECCENTRICITY = math.sqrt(FLATTENING * (2 - FLATTENING))
+
+# %% [markdown]
+# Projection
+#
+
+
+# %%
+def central_meridian(zone: int) -> float:
+    """Longitude (degrees) of the central meridian of a UTM zone."""
+    return zone * 6 - 183
+
+
+def lonlat_to_utm(lon, lat, zone: int = 23, south: bool = True):
+    """
+    Project longitude/latitude arrays (degrees) to UTM easting/northing (metres).
+
+    Parameters:
+    -----------
+    lon : array-like
+        Longitudes in degrees
+    lat : array-like
+        Latitudes in degrees
+    zone : int, optional
+        UTM zone (default: 23, as EPSG:31983)
+    south : bool, optional
+        Southern hemisphere false northing of 10,000 km (default: True)
+
+    Returns:
+    --------
+    tuple
+        (x, y) - NumPy arrays with easting and northing in metres
+    """
+    lam = np.radians(np.asarray(lon, dtype=float) - central_meridian(zone))
+    phi = np.radians(np.asarray(lat, dtype=float))
+
+    # conformal latitude
+    tau = np.tan(phi)
+    sigma = np.sinh(_ECCENTRICITY * np.arctanh(_ECCENTRICITY * tau / np.hypot(1, tau)))
+    tau_prime = tau * np.hypot(1, sigma) - sigma * np.hypot(1, tau)
+
+    # spherical transverse Mercator, then Krüger's series
+    cos_lam = np.cos(lam)
+    xi_prime = np.arctan2(tau_prime, cos_lam)
+    eta_prime = np.arcsinh(np.sin(lam) / np.hypot(tau_prime, cos_lam))
+
+    j2 = 2 * np.arange(1, len(_ALPHA) + 1)
+    angle = j2 * xi_prime[..., None]
+    hyperbolic = j2 * eta_prime[..., None]
+    xi = xi_prime + (_ALPHA * np.sin(angle) * np.cosh(hyperbolic)).sum(axis=-1)
+    eta = eta_prime + (_ALPHA * np.cos(angle) * np.sinh(hyperbolic)).sum(axis=-1)
+
+    x = FALSE_EASTING + SCALE_FACTOR * _RECTIFYING_RADIUS * eta
+    y = SCALE_FACTOR * _RECTIFYING_RADIUS * xi
+    if south:
+        y = y + FALSE_NORTHING_SOUTH
+    return x, y
+
+
+def project_coordinates(coords, zone: int = 23, south: bool = True) -> np.ndarray:
+    """
+    Project a (points x 2) array of lon/lat pairs, as returned by
+    geojsonCache.geometry_to_arrays, to a (points x 2) array of UTM metres.
+    """
+    coords = np.asarray(coords, dtype=float)
+    x, y = lonlat_to_utm(coords[:, 0], coords[:, 1], zone, south)
+    return np.column_stack((x, y))
+
+
+# %% [markdown]
+# GeoJSON conversion (ogr2ogr replacement)
+#
+
+
+# %%
+def _project_positions(coordinates, zone: int, south: bool):
+    # nested GeoJSON coordinates; every innermost list of positions is
+    # projected with one vectorized call, extra ordinates (z) are kept
+    if not coordinates:
+        return coordinates
+    if isinstance(coordinates[0], (int, float)):
+        return _project_positions([coordinates], zone, south)[0]
+    if isinstance(coordinates[0][0], (int, float)):
+        projected = project_coordinates(
+            [position[:2] for position in coordinates], zone, south
+        )
+        return [
+            [*xy, *position[2:]]
+            for xy, position in zip(projected.tolist(), coordinates)
+        ]
+    return [_project_positions(part, zone, south) for part in coordinates]
+
+
+def project_geometry(geometry: dict | None, zone: int = 23, south: bool = True):
+    """
+    Copy of a GeoJSON geometry of any type with its coordinates projected
+    to UTM; None (a feature without geometry) stays None.
+    """
+    if geometry is None:
+        return None
+    if geometry["type"] == "GeometryCollection":
+        return {
+            **geometry,
+            "geometries": [
+                project_geometry(part, zone, south) for part in geometry["geometries"]
+            ],
+        }
+    return {
+        **geometry,
+        "coordinates": _project_positions(geometry["coordinates"], zone, south),
+    }
+
+
+def convert_file(
+    source: str,
+    target: str,
+    feature_index: int | None = None,
+    zone: int = 23,
+    south: bool = True,
+):
+    """
+    Write a copy of a WGS84 GeoJSON file projected to UTM, like
+    `ogr2ogr -f "GeoJSON" -t_srs "EPSG:31983" target source`: every feature
+    keeps its id, properties and geometry type. With feature_index only
+    that feature is written. The features are streamed, one in memory at a
+    time.
+    """
+    # SIRGAS 2000 / UTM zones 17S-25S are EPSG:31977-31985, otherwise WGS 84 / UTM
+    epsg = (32700 if south else 32600) + zone
+    if south and 17 <= zone <= 25:
+        epsg = 31960 + zone
+    crs = {"type": "name", "properties": {"name": f"urn:ogc:def:crs:EPSG::{epsg}"}}
+
+    with open(target, "w") as f:
+        f.write(
+            '{"type": "FeatureCollection", "crs": %s, "features": [\n' % json.dumps(crs)
+        )
+        written = 0
+        for index, feature in enumerate(iter_features(source)):
+            if feature_index is not None and index != feature_index:
+                continue
+            projected = {
+                **feature,
+                "geometry": project_geometry(feature.get("geometry"), zone, south),
+            }
+            f.write(",\n" if written else "")
+            json.dump(projected, f)
+            written += 1
+            if feature_index is not None:
+                break
+        f.write("\n]}\n")
+    if feature_index is not None and not written:
+        raise IndexError(f"{source} has no feature {feature_index}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Project a WGS84 GeoJSON file to UTM (default EPSG:31983)"
+    )
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument(
+        "--feature-index",
+        type=int,
+        default=None,
+        help="write only this feature (default: every feature)",
+    )
+    parser.add_argument("--zone", type=int, default=23)
+    parser.add_argument("--north", action="store_true")
+    args = parser.parse_args()
+    convert_file(
+        args.source, args.target, args.feature_index, args.zone, not args.north
+    )
@@ -11,22 +11,34 @@
 #
 # EPSG:31983: https://epsg.io/31983
 #
+# projection.py does the same conversion in-process (no GDAL needed), and
+# load_geojson_rings(project=True) reads the original sergipe.json/amazonas.json
+# directly.
+#
 
 # %% [markdown]
 # Import the necessary library's
 #
+# matplotlib is imported inside plot_state_visualization and shapely only by
+# the optional cross-check of area, so importing this module for the
+# computation alone does not load them.
+#
 
 # %%
-from itertools import chain
+from itertools import accumulate, chain
 import json
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
-from integrationsMethods import (
-    result_I_Simpson_with_y_list,
-    result_I_trapezoid_with_y_list,
-)
+from integrationsMethods import result_I_trapezoid_and_Simpson_with_y_list
 import numpy as np
-from shapely import Polygon
+from projection import project_coordinates
+from geojsonCache import geometry_to_arrays, load_rings_cached, read_feature_geometry
+from geometryMetrics import polygon_area, shapely_area
+from instrumentation import Recorder, count, instrumented, stage
+from scanlineIntersections import (
+    csr_to_all_y_in_x,
+    find_all_y_for_x_sweep,
+    intersect_scanlines,
+)
+from simplification import simplify_rings
 
 # %% [markdown]
 # Configuration
@@ -113,12 +125,19 @@ if __name__ == "__main__":
     ) = options.get()
     print(offset_x)
 
+    # Per-stage timing, memory and counters (instrumentation.py), written as
+    # JSON after the result, e.g. "question2_report.json"
+    instrument_report = None
+    if instrument_report is not None:
+        recorder = Recorder(memory=True).start()
+
 # %% [markdown]
 # Extract the points from the geojson
 #
 
 
 # %%
+@instrumented
 def load_geojson_coordinates() -> list[list[float, float]]:
     """
     Load coordinates from a GeoJSON file.
@@ -149,10 +168,78 @@ def load_geojson_coordinates() -> list[list[float, float]]:
     return coordinates
 
 
+@instrumented
+def load_geojson_rings(
+    use_cache: bool = False, project: bool = False
+) -> tuple[list[list[float]], list[int]]:
+    """
+    Load every ring of every polygon of a GeoJSON feature.
+
+    Unlike load_geojson_coordinates, which follows geometry_path to a single
+    ring, this keeps the islands and holes of a MultiPolygon. The rings are
+    concatenated in file order, so the whole geometry goes through the
+    intersection engines in one pass.
+
+    Parameters:
+    -----------
+    file_name : str, optional
+        Name of the GeoJSON file without extension (default: 'sergipeEPSG31983')
+    feature_index : int, optional
+        Index of the feature to extract (default: 0)
+    use_cache : bool, optional
+        Read the coordinates through the binary cache of geojsonCache: the
+        first run parses only the selected feature, later runs memory-map the
+        cached arrays; points is then a (points x 2) NumPy array (default: False)
+    project : bool, optional
+        file_name is an original WGS84 file read from ./{file_name}.json (e.g.
+        'sergipe') and projected in-process to EPSG:31983 by projection.py,
+        instead of an ogr2ogr output; points is then a (points x 2) NumPy
+        array (default: False)
+
+    Returns:
+    --------
+    tuple
+        (points, ring_offsets)
+        - points: every coordinate point, ring after ring, [(x1, y1), (x2, y2), ...]
+        - ring_offsets: start of each ring in points plus the final end,
+          ring r is points[ring_offsets[r]:ring_offsets[r + 1]]
+    """
+    if project:
+        path = f"./{file_name}.json"
+        if use_cache:
+            coordinates, ring_offsets = load_rings_cached(path, feature_index)
+        else:
+            coordinates, ring_offsets = geometry_to_arrays(
+                read_feature_geometry(path, feature_index)
+            )
+        return project_coordinates(coordinates), ring_offsets.tolist()
+
+    if use_cache:
+        points, ring_offsets = load_rings_cached(
+            f"./{file_name}.geojson", feature_index
+        )
+        return points, ring_offsets.tolist()
+
+    with open(f"./{file_name}.geojson") as f:
+        data = json.load(f)
+
+    geometry = data["features"][feature_index]["geometry"]
+    polygons = geometry["coordinates"]
+    if geometry["type"] == "Polygon":
+        polygons = [polygons]
+
+    rings = [ring for polygon in polygons for ring in polygon]
+    points = list(chain(*rings))
+    ring_offsets = [0, *accumulate(len(ring) for ring in rings)]
+
+    return points, ring_offsets
+
+
 # Usage example:
 if __name__ == "__main__":
-    points = load_geojson_coordinates()
+    points, ring_offsets = load_geojson_rings(use_cache=True)
     print(points)
+    print(ring_offsets)
 
 # %% [markdown]
 # Generate the coordinates of the State perimeter
@@ -160,6 +247,7 @@ if __name__ == "__main__":
 
 
 # %%
+@instrumented
 def normalize_coordinates(
     points,
 ):
@@ -181,7 +269,12 @@ def normalize_coordinates(
     --------
     tuple
         (x, y) - Two lists containing normalized X and Y coordinates
+        (NumPy arrays when points is an array)
     """
+    if isinstance(points, np.ndarray):
+        # cached coordinates (points x 2)
+        return (points[:, 0] - offset_x) / weight, (points[:, 1] - offset_y) / weight
+
     x = [(point[0] - offset_x) / weight for point in points]
     y = [(point[1] - offset_y) / weight for point in points]
 
@@ -194,6 +287,62 @@ if __name__ == "__main__":
     print(x)
     print(y)
 
+# %% [markdown]
+# Simplify the perimeter (optional)
+#
+# Removes the vertices that change the area by less than max_area_m2 each
+# (Visvalingam–Whyatt, see simplification.py), so the intersection step and
+# the Shapely reference run on fewer edges.
+#
+
+
+# %%
+@instrumented
+def simplify_coordinates(x, y, ring_offsets=None, max_area_m2=None):
+    """
+    Simplify the normalized perimeter with an area tolerance in m².
+
+    Parameters:
+    -----------
+    x : list or array-like
+        Normalized X coordinates
+    y : list or array-like
+        Normalized Y coordinates
+    ring_offsets : list, optional
+        Start of each ring plus the final end (default: a single ring)
+    max_area_m2 : float, optional
+        Largest area change per removed vertex in m² (default: no simplification)
+
+    Returns:
+    --------
+    tuple
+        (x, y, ring_offsets, keep, report) - simplified arrays, the mask of
+        the kept vertices (to index points) and the report of
+        simplification.simplify_rings with the area delta in m²
+    """
+    if max_area_m2 is None:
+        max_area_m2 = 0.0
+    keep, new_ring_offsets, report = simplify_rings(
+        x, y, ring_offsets, max_area_m2 / weight**2
+    )
+    report["area_delta_m2"] = report.pop("area_delta") * weight**2
+    report["area_change_bound_m2"] = report.pop("area_change_bound") * weight**2
+    x, y = np.asarray(x)[keep], np.asarray(y)[keep]
+    if ring_offsets is not None:
+        ring_offsets = new_ring_offsets.tolist()
+    return x, y, ring_offsets, keep, report
+
+
+if __name__ == "__main__":
+    # e.g. 1e5 m² for Amazonas; None keeps every vertex
+    simplify_max_area_m2 = None
+    if simplify_max_area_m2 is not None:
+        x, y, ring_offsets, keep, simplification_report = simplify_coordinates(
+            x, y, ring_offsets, simplify_max_area_m2
+        )
+        points = points[keep]
+        print(simplification_report)
+
 # %% [markdown]
 # Intersections Points
 #
@@ -228,6 +377,8 @@ def find_all_y_for_x(x_target, x_points, y_points):
                 y_intersection = y1 + t * (y2 - y1)
                 y_intersections.append(y_intersection)
 
+    count("segments_tested", max(len(x_points) - 1, 0))
+
     # Remove duplicates and sort
     y_intersections = reversed(sorted(list(set(y_intersections))))
 
@@ -236,9 +387,12 @@ def find_all_y_for_x(x_target, x_points, y_points):
     return points
 
 
+@instrumented
 def generate_intersection_points(
     x_points,
     y_points,
+    engine="scan",
+    ring_offsets=None,
 ):
     """
     Generate intersection points between vertical lines and a polygon perimeter.
@@ -249,6 +403,15 @@ def generate_intersection_points(
         X coordinates of the polygon perimeter
     y_points : list
         Y coordinates of the polygon perimeter
+    engine : str, optional
+        "scan" walks every segment for every line (find_all_y_for_x),
+        "sweep" uses the sweep-line engine (find_all_y_for_x_sweep),
+        "numpy" the vectorized engine (intersect_scanlines) (default: "scan")
+    ring_offsets : list, optional
+        Ring boundaries of a multi-ring geometry (see load_geojson_rings).
+        Needs the "sweep" or "numpy" engine, which then use the half-open
+        crossing rule so the even-odd pairing stays correct with holes
+        (default: a single ring)
     start_x : float, optional
         Starting X value for the interval (default: -10)
     end_x : float, optional
@@ -272,11 +435,39 @@ def generate_intersection_points(
     step = int(step_x * weight)
 
     x_range = list(range(start, end, step))
-    all_y_in_x = [
-        find_all_y_for_x(x_target / weight, x_points, y_points) for x_target in x_range
-    ]
+    # several rings need the half-open crossing rule (see scanlineIntersections)
+    half_open = ring_offsets is not None
+    if engine == "scan":
+        if half_open:
+            raise ValueError('The "scan" engine handles a single ring only')
+        all_y_in_x = [
+            find_all_y_for_x(x_target / weight, x_points, y_points)
+            for x_target in x_range
+        ]
+    elif engine == "sweep":
+        all_y_in_x = find_all_y_for_x_sweep(
+            [x_target / weight for x_target in x_range],
+            x_points,
+            y_points,
+            ring_offsets=ring_offsets,
+            half_open=half_open,
+        )
+    elif engine == "numpy":
+        x_targets = [x_target / weight for x_target in x_range]
+        offsets, ys = intersect_scanlines(
+            x_targets,
+            x_points,
+            y_points,
+            ring_offsets=ring_offsets,
+            half_open=half_open,
+        )
+        all_y_in_x = csr_to_all_y_in_x(x_targets, offsets, ys)
+    else:
+        raise ValueError(f'Unknown engine "{engine}" (use "scan", "sweep" or "numpy")')
 
     points_interval = list(chain(*all_y_in_x))
+    count("lines", len(x_range))
+    count("intersections_found", len(points_interval))
     x_interval = [point[0] for point in points_interval]
     y_interval = [point[1] for point in points_interval]
 
@@ -288,6 +479,8 @@ if __name__ == "__main__":
     x_interval, y_interval, points_interval, all_y_in_x = generate_intersection_points(
         x,
         y,
+        engine="sweep",
+        ring_offsets=ring_offsets,
     )
     print(x_interval)
     print(y_interval)
@@ -356,20 +549,48 @@ def calculate_total_distance(item: list[tuple[float, float]]) -> float:
     return 0
 
 
-def area():
-    total_distances = list(map(calculate_total_distance, all_y_in_x))
-    area_m2_trapezoid = result_I_trapezoid_with_y_list(total_distances, step_x) * (
-        weight**2
-    )
-    area_m2_Simpson = result_I_Simpson_with_y_list(total_distances, step_x) * (
-        weight**2
-    )
+@instrumented
+def area(ring_offsets=None, reference=True):
+    """
+    Area by the trapezoid and Simpson rules from all_y_in_x, and the
+    reference area of points by the shoelace formula
+    (geometryMetrics.polygon_area). reference="shapely" computes the
+    reference with Shapely instead, as a cross-check; with reference=False
+    the two reference values are None.
+
+    Returns:
+    --------
+    tuple
+        (area_m2_trapezoid, area_m2_Simpson, area_km2_trapezoid,
+        area_km2_Simpson, area_m2_shapely, area_km2_shapely)
+    """
+    with stage("calculate_total_distance"):
+        total_distances = list(map(calculate_total_distance, all_y_in_x))
+    # both rules from a single pass over the distances
+    with stage("integration"):
+        I_trapezoid, I_Simpson, _ = result_I_trapezoid_and_Simpson_with_y_list(
+            total_distances, step_x
+        )
+        count("integrand_evaluations", len(total_distances))
+    area_m2_trapezoid = I_trapezoid * (weight**2)
+    area_m2_Simpson = I_Simpson * (weight**2)
     area_km2_trapezoid = area_m2_trapezoid / 1e6
     area_km2_Simpson = area_m2_Simpson / 1e6
 
-    # Calculate Shapely area
-    polygon = Polygon(points)
-    area_m2_shapely = polygon.area
+    if not reference:
+        return (
+            area_m2_trapezoid,
+            area_m2_Simpson,
+            area_km2_trapezoid,
+            area_km2_Simpson,
+            None,
+            None,
+        )
+
+    # Calculate the reference area
+    reference_function = shapely_area if reference == "shapely" else polygon_area
+    with stage("reference_area"):
+        area_m2_shapely = reference_function(np.asarray(points), ring_offsets)
     area_km2_shapely = area_m2_shapely / 1e6
 
     return (
@@ -390,7 +611,7 @@ if __name__ == "__main__":
         area_km2_Simpson,
         area_m2_shapely,
         area_km2_shapely,
-    ) = area()
+    ) = area(ring_offsets)
     print(area_m2_trapezoid)
     print(area_m2_Simpson)
     print(area_km2_trapezoid)
@@ -420,6 +641,8 @@ def result(
     ):
         print("There is no result!")
         return
+    # area(reference=False) leaves the reference area out
+    has_reference = area_m2_shapely is not None and area_km2_shapely is not None
 
     print("=" * 60)
     print(f"CÁLCULO DA ÁREA DO ESTADO: {state_name.upper()}")
@@ -444,13 +667,14 @@ def result(
     print(f"  Erro absoluto: {erro_simpson:,.2f} km²")
     print(f"  Erro relativo:  {erro_relativo_simpson:.2f}%")
 
-    print(f"\nMétodo Shapely (Referência):")
-    print(f"  Área em m²:  {area_m2_shapely:,.2f} m²")
-    print(f"  Área em km²: {area_km2_shapely:,.2f} km²")
-    erro_shapely = abs(area_km2_shapely - area_oficial_km2)
-    erro_relativo_shapely = (erro_shapely / area_oficial_km2) * 100
-    print(f"  Erro absoluto: {erro_shapely:,.2f} km²")
-    print(f"  Erro relativo:  {erro_relativo_shapely:.2f}%")
+    if has_reference:
+        print(f"\nÁrea de referência (fórmula do laço):")
+        print(f"  Área em m²:  {area_m2_shapely:,.2f} m²")
+        print(f"  Área em km²: {area_km2_shapely:,.2f} km²")
+        erro_shapely = abs(area_km2_shapely - area_oficial_km2)
+        erro_relativo_shapely = (erro_shapely / area_oficial_km2) * 100
+        print(f"  Erro absoluto: {erro_shapely:,.2f} km²")
+        print(f"  Erro relativo:  {erro_relativo_shapely:.2f}%")
 
     print(f"\nDiferença entre Trapézio e Simpson:")
     print(
@@ -460,19 +684,22 @@ def result(
         f"  Diferença relativa:  {abs(area_km2_trapezoid - area_km2_Simpson) / area_km2_trapezoid * 100:.2f}%"
     )
 
-    print(f"\nDiferença entre Trapézio e Shapely:")
-    print(
-        f"  Diferença absoluta: {abs(area_km2_trapezoid - area_km2_shapely):,.2f} km²"
-    )
-    print(
-        f"  Diferença relativa:  {abs(area_km2_trapezoid - area_km2_shapely) / area_km2_shapely * 100:.2f}%"
-    )
+    if has_reference:
+        print(f"\nDiferença entre Trapézio e referência:")
+        print(
+            f"  Diferença absoluta: {abs(area_km2_trapezoid - area_km2_shapely):,.2f} km²"
+        )
+        print(
+            f"  Diferença relativa:  {abs(area_km2_trapezoid - area_km2_shapely) / area_km2_shapely * 100:.2f}%"
+        )
 
-    print(f"\nDiferença entre Simpson e Shapely:")
-    print(f"  Diferença absoluta: {abs(area_km2_Simpson - area_km2_shapely):,.2f} km²")
-    print(
-        f"  Diferença relativa:  {abs(area_km2_Simpson - area_km2_shapely) / area_km2_shapely * 100:.2f}%"
-    )
+        print(f"\nDiferença entre Simpson e referência:")
+        print(
+            f"  Diferença absoluta: {abs(area_km2_Simpson - area_km2_shapely):,.2f} km²"
+        )
+        print(
+            f"  Diferença relativa:  {abs(area_km2_Simpson - area_km2_shapely) / area_km2_shapely * 100:.2f}%"
+        )
 
     print("=" * 60)
 
@@ -490,13 +717,19 @@ if __name__ == "__main__":
     except:
         raise ValueError
 
+    if instrument_report is not None:
+        recorder.stop().to_json(instrument_report)
+        print(f"Instrumentação salva em {instrument_report}")
+
 # %% [markdown]
 # Graph Configuration
 #
 
 
 # %%
-def plot_state_visualization(x, y, x_interval=(None,), y_interval=(None,)):
+def plot_state_visualization(
+    x, y, x_interval=(None,), y_interval=(None,), ring_offsets=None, lod=False
+):
     """
     Create a visualization plot for a Brazilian State geographic data with optional intersection points.
 
@@ -510,6 +743,14 @@ def plot_state_visualization(x, y, x_interval=(None,), y_interval=(None,)):
         X coordinates of intersection points (default: None)
     y_interval : list or array-like, optional
         Y coordinates of intersection points (default: None)
+    ring_offsets : list, optional
+        Ring boundaries of a multi-ring geometry; each ring is drawn as its own
+        closed line (default: a single ring)
+    lod : bool, optional
+        Level-of-detail mode for large geometries (stateRendering.py): the
+        perimeter is decimated to screen resolution and again on every zoom,
+        and the intersections are drawn as scanline spans in a single
+        LineCollection instead of scatter markers (default: False)
     figsize : tuple, optional
         Figure size as (width, height) in inches (default: (10, 8))
     linewidth : float, optional
@@ -544,11 +785,37 @@ def plot_state_visualization(x, y, x_interval=(None,), y_interval=(None,)):
     - Aspect ratio is set to 1:1 for accurate geographic representation
     - Axes are centered at (0,0) with visible horizontal and vertical lines
     """
+    # imported here so computation-only runs never load matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MultipleLocator
+
+    # Break the perimeter line between rings so they are not joined
+    if ring_offsets is not None and not lod:
+        x = np.insert(np.asarray(x, dtype=float), ring_offsets[1:-1], np.nan)
+        y = np.insert(np.asarray(y, dtype=float), ring_offsets[1:-1], np.nan)
+
     # Create figure and axis
     fig, ax = plt.subplots(figsize=figsize)
 
     # Plot main perimeter line
-    ax.plot(x, y, linewidth=linewidth, label=state_name, color=line_color)
+    if lod:
+        from stateRendering import draw_state
+
+        show_points = show_intersection_points and x_interval is not None
+        draw_state(
+            ax,
+            x,
+            y,
+            x_interval if show_points else None,
+            y_interval if show_points else None,
+            ring_offsets,
+            label=state_name,
+            linewidth=linewidth,
+            line_color=line_color,
+            scanline_color=point_color,
+        )
+    else:
+        ax.plot(x, y, linewidth=linewidth, label=state_name, color=line_color)
 
     # Set up the grid with major and minor divisions
     ax.grid(True, which="both", linestyle="-", linewidth=0.7, alpha=0.7)
@@ -578,7 +845,12 @@ def plot_state_visualization(x, y, x_interval=(None,), y_interval=(None,)):
     ax.tick_params(axis="both", which="major", labelsize=10)
 
     # Add intersection points if provided and enabled
-    if show_intersection_points and x_interval is not None and y_interval is not None:
+    if (
+        not lod
+        and show_intersection_points
+        and x_interval is not None
+        and y_interval is not None
+    ):
         ax.scatter(
             x_interval,
             y_interval,
@@ -596,7 +868,9 @@ def plot_state_visualization(x, y, x_interval=(None,), y_interval=(None,)):
 
 # Usage example:
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     fig, ax = plot_state_visualization(
-        x, y, x_interval=x_interval, y_interval=y_interval
+        x, y, x_interval=x_interval, y_interval=y_interval, ring_offsets=ring_offsets
     )
     plt.show()
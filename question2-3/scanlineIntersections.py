@@ -0,0 +1,480 @@
+# %% [markdown]
+# Intersection engines between vertical lines and the State perimeter
+#
+# Alternatives to the per-line scan of question2.find_all_y_for_x, which walks
+# every perimeter segment for every vertical line.
+#
+# Geometries with several rings (islands, holes, every polygon of a
+# MultiPolygon) are passed as one contiguous pair of x, y arrays plus
+# ring_offsets: ring r is x[ring_offsets[r]:ring_offsets[r + 1]].
+#
+# Two crossing rules are available:
+#
+# - closed (default): the rule of find_all_y_for_x, closed x-extents, vertical
+#   segments on the line contribute both end points, repeated Y values removed
+# - half_open: an edge crosses the line when min(x1, x2) <= x < max(x1, x2),
+#   vertical edges never do and nothing is removed. Every closed ring then
+#   crosses each line an even number of times, so the even-odd pairing of
+#   calculate_total_distance stays correct with holes and several rings
+#
+
+# %%
+import heapq
+
+import numpy as np
+
+from instrumentation import count
+
+# %% [markdown]
+# Edge table
+#
+
+
+# %%
+def build_edges(x_points, y_points, ring_offsets=None):
+    """
+    Build the edge arrays of a perimeter given by consecutive points.
+
+    Parameters:
+    -----------
+    x_points : list or array-like
+        X coordinates of the polygon perimeter
+    y_points : list or array-like
+        Y coordinates of the polygon perimeter
+    ring_offsets : list or array-like, optional
+        Start of each ring in the point arrays plus the final end; no edge
+        links the last point of a ring to the first one of the next
+        (default: a single ring)
+
+    Returns:
+    --------
+    tuple
+        (x1, y1, x2, y2) - NumPy arrays with one entry per edge, all the rings
+        flattened in order (see edge_ring_ids)
+    """
+    x_points = np.asarray(x_points, dtype=float)
+    y_points = np.asarray(y_points, dtype=float)
+    if ring_offsets is None:
+        return x_points[:-1], y_points[:-1], x_points[1:], y_points[1:]
+
+    starts = np.arange(max(len(x_points) - 1, 0))
+    ring_ends = np.asarray(ring_offsets)[1:-1] - 1
+    starts = starts[~np.isin(starts, ring_ends)]
+    return (
+        x_points[starts],
+        y_points[starts],
+        x_points[starts + 1],
+        y_points[starts + 1],
+    )
+
+
+def edge_ring_ids(ring_offsets):
+    """
+    Ring of each edge returned by build_edges for the same ring_offsets.
+    """
+    ring_sizes = np.maximum(np.diff(np.asarray(ring_offsets)) - 1, 0)
+    return np.repeat(np.arange(len(ring_sizes)), ring_sizes)
+
+
+# %% [markdown]
+# Sweep-line engine
+#
+
+
+# %%
+def find_all_y_for_x_sweep(
+    x_targets, x_points, y_points, ring_offsets=None, half_open=False
+):
+    """
+    Find the intersections of many vertical lines with the perimeter in one sweep.
+
+    The edges are sorted by the left end of their x-extent once. While the
+    sweep moves across the sorted x targets, an active-edge table keeps only
+    the edges whose x-extent contains the current line: edges enter when the
+    sweep reaches their left end and leave (through a heap keyed by their
+    right end) once it passes their right end. Each line costs O(log n + k),
+    k being the number of edges it crosses, instead of O(n).
+
+    By default the intersection rule is the same as find_all_y_for_x (see
+    the crossing rules at the top of this module).
+
+    Parameters:
+    -----------
+    x_targets : list or array-like
+        X values of the vertical lines, in any order
+    x_points : list or array-like
+        X coordinates of the polygon perimeter
+    y_points : list or array-like
+        Y coordinates of the polygon perimeter
+    ring_offsets : list or array-like, optional
+        Ring boundaries in the point arrays (default: a single ring)
+    half_open : bool, optional
+        Use the half-open crossing rule (default: False)
+
+    Returns:
+    --------
+    list
+        all_y_in_x - for each x target (in the given order), the list of
+        (x_target, y) tuples sorted by decreasing y, as find_all_y_for_x returns
+    """
+    x1, y1, x2, y2 = build_edges(x_points, y_points, ring_offsets)
+    x_min = np.minimum(x1, x2)
+    x_max = np.maximum(x1, x2)
+    edges_by_start = np.argsort(x_min, kind="stable")
+    if half_open:
+        # vertical edges never cross a line under the half-open rule
+        edges_by_start = edges_by_start[(x_max > x_min)[edges_by_start]]
+    x1, y1, x2, y2 = x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist()
+    x_min, x_max = x_min.tolist(), x_max.tolist()
+    edges_by_start = edges_by_start.tolist()
+
+    x_targets = list(x_targets)
+    all_y_in_x = [None] * len(x_targets)
+
+    active = {}  # edge index -> None, insertion ordered
+    leaving = []  # heap of (x_max, edge index)
+    next_edge = 0
+    segments_tested = 0
+    for position in sorted(range(len(x_targets)), key=x_targets.__getitem__):
+        x_target = x_targets[position]
+
+        # edges whose x-extent starts at or before the line enter the table
+        while (
+            next_edge < len(edges_by_start)
+            and x_min[edges_by_start[next_edge]] <= x_target
+        ):
+            i = edges_by_start[next_edge]
+            active[i] = None
+            heapq.heappush(leaving, (x_max[i], i))
+            next_edge += 1
+        # edges that end before the line (or on it, for the half-open rule) leave it
+        while leaving and (
+            leaving[0][0] <= x_target if half_open else leaving[0][0] < x_target
+        ):
+            del active[heapq.heappop(leaving)[1]]
+
+        segments_tested += len(active)
+        y_intersections = []
+        for i in active:
+            if x2[i] - x1[i] == 0:
+                y_intersections.append(y1[i])
+                y_intersections.append(y2[i])
+            else:
+                t = (x_target - x1[i]) / (x2[i] - x1[i])
+                y_intersections.append(y1[i] + t * (y2[i] - y1[i]))
+
+        if not half_open:
+            y_intersections = set(y_intersections)
+        all_y_in_x[position] = [
+            (x_target, y) for y in sorted(y_intersections, reverse=True)
+        ]
+
+    count("segments_tested", segments_tested)
+    return all_y_in_x
+
+
+# %% [markdown]
+# Vectorized NumPy engine (CSR output)
+#
+
+
+# %%
+def _span_mask(x, x_min, x_max, half_open):
+    if half_open:
+        return (x_min <= x) & (x < x_max)
+    return (x_min <= x) & (x <= x_max)
+
+
+def _intersections(lines, edges, x_line, x1, y1, x2, y2, unique=True):
+    """
+    Y values where the candidate (line, edge) pairs cross, given that the edge
+    x-extent contains the line. Returns (lines, ys) sorted by line, then by
+    decreasing y; repeated (line, y) pairs are removed when unique is set.
+    """
+    dx = x2[edges] - x1[edges]
+    sloped = dx != 0
+    edges_s = edges[sloped]
+    t = (x_line[sloped] - x1[edges_s]) / dx[sloped]
+    ys_s = y1[edges_s] + t * (y2[edges_s] - y1[edges_s])
+    # vertical segments lying on the line contribute both end points
+    lines_v, edges_v = lines[~sloped], edges[~sloped]
+
+    lines = np.concatenate((lines[sloped], lines_v, lines_v))
+    ys = np.concatenate((ys_s, y1[edges_v], y2[edges_v]))
+
+    order = np.lexsort((-ys, lines))
+    lines, ys = lines[order], ys[order]
+    if not unique:
+        return lines, ys
+    keep = np.ones(len(ys), dtype=bool)
+    keep[1:] = (lines[1:] != lines[:-1]) | (ys[1:] != ys[:-1])
+    return lines[keep], ys[keep]
+
+
+def _to_csr(n_lines, lines, ys):
+    offsets = np.zeros(n_lines + 1, dtype=np.intp)
+    np.cumsum(np.bincount(lines, minlength=n_lines), out=offsets[1:])
+    return offsets, ys
+
+
+def intersect_scanlines(
+    x_targets,
+    x_points,
+    y_points,
+    memory_budget_mb=64,
+    ring_offsets=None,
+    half_open=False,
+):
+    """
+    Intersect every vertical line with every perimeter edge in broadcast form.
+
+    The lines are processed in chunks; for each chunk a (lines x edges) span
+    mask is built, and the Y values are interpolated only where the mask is
+    set. The chunk size keeps the mask temporaries under memory_budget_mb.
+    By default the intersection rule is the same as find_all_y_for_x.
+
+    Parameters:
+    -----------
+    x_targets : list or array-like
+        X values of the vertical lines
+    x_points : list or array-like
+        X coordinates of the polygon perimeter
+    y_points : list or array-like
+        Y coordinates of the polygon perimeter
+    memory_budget_mb : float, optional
+        Memory allowed for the per-chunk temporaries (default: 64)
+    ring_offsets : list or array-like, optional
+        Ring boundaries in the point arrays (default: a single ring)
+    half_open : bool, optional
+        Use the half-open crossing rule (default: False)
+
+    Returns:
+    --------
+    tuple
+        (offsets, ys) - CSR-style pair: the Y values of line i are
+        ys[offsets[i]:offsets[i + 1]], sorted by decreasing y
+    """
+    x1, y1, x2, y2 = build_edges(x_points, y_points, ring_offsets)
+    x_targets = np.asarray(x_targets, dtype=float)
+    x_min = np.minimum(x1, x2)
+    x_max = np.maximum(x1, x2)
+
+    # three boolean (lines x edges) temporaries per chunk
+    lines_per_chunk = max(1, int(memory_budget_mb * 1e6 // (3 * max(len(x1), 1))))
+    count("segments_tested", len(x_targets) * len(x1))
+
+    all_lines = []
+    all_ys = []
+    for start in range(0, len(x_targets), lines_per_chunk):
+        X = x_targets[start : start + lines_per_chunk, None]
+        lines, edges = np.nonzero(_span_mask(X, x_min, x_max, half_open))
+        lines, ys = _intersections(
+            lines, edges, X[lines, 0], x1, y1, x2, y2, unique=not half_open
+        )
+        all_lines.append(lines + start)
+        all_ys.append(ys)
+
+    if not all_ys:
+        return _to_csr(len(x_targets), np.zeros(0, dtype=np.intp), np.zeros(0))
+    return _to_csr(len(x_targets), np.concatenate(all_lines), np.concatenate(all_ys))
+
+
+def calculate_total_distances(offsets, ys):
+    """
+    CSR version of question2.calculate_total_distance for every line at once.
+
+    Within each line the Y values are paired as (0, 1), (2, 3), ... and the
+    absolute differences of the pairs are summed; an unpaired last value is
+    ignored.
+
+    Parameters:
+    -----------
+    offsets : array-like
+        Start of each line in ys plus the final end (len = lines + 1)
+    ys : array-like
+        Y values of every line, as returned by intersect_scanlines
+
+    Returns:
+    --------
+    numpy.ndarray
+        Total distance of each line
+    """
+    offsets = np.asarray(offsets, dtype=np.intp)
+    ys = np.asarray(ys, dtype=float)
+    starts = offsets[:-1]
+    counts = np.diff(offsets)
+
+    # position of each value inside its own line
+    local_index = np.arange(len(ys)) - np.repeat(starts, counts)
+    line_count = np.repeat(counts, counts)
+    pair_start = (local_index % 2 == 0) & (local_index + 1 < line_count)
+
+    pairs = np.flatnonzero(pair_start)
+
+    # extra slot so the starts of empty trailing lines stay in range
+    contributions = np.zeros(len(ys) + 1)
+    contributions[pairs] = np.abs(ys[pairs] - ys[pairs + 1])
+    if not len(starts):
+        return np.zeros(0)
+    totals = np.add.reduceat(contributions, starts)
+    totals[counts == 0] = 0
+    return totals
+
+
+def csr_to_all_y_in_x(x_targets, offsets, ys):
+    """
+    Convert the (offsets, ys) pair back to the all_y_in_x list of lists of
+    (x, y) tuples used by question2.
+    """
+    ys = np.asarray(ys).tolist()
+    return [
+        [(x_target, y) for y in ys[offsets[i] : offsets[i + 1]]]
+        for i, x_target in enumerate(x_targets)
+    ]
+
+
+# %% [markdown]
+# Persistent edge index for arbitrary queries
+#
+
+
+# %%
+class EdgeIndex:
+    """
+    Bucketed x-grid over the perimeter edges, built once and queried at any x.
+
+    The x-extent of the perimeter is split into equal buckets and every edge
+    is listed (CSR-style) in each bucket its x-extent overlaps. A query only
+    tests the edges of the bucket containing x, so it costs O(k) with k the
+    bucket size instead of a scan over every segment. By default the
+    intersection rule is the same as find_all_y_for_x; ring_offsets and
+    half_open work as in intersect_scanlines.
+
+    Examples:
+    ---------
+    >>> index = EdgeIndex(x, y)
+    >>> index.ys_at(0.25)                      # [(0.25, y_top), ..., (0.25, y_bottom)]
+    >>> offsets, ys = index.ys_at_many(xs)     # CSR pair, as intersect_scanlines
+    >>> index.save("sergipe_index.npz")
+    >>> index = EdgeIndex.load("sergipe_index.npz")
+    """
+
+    def __init__(
+        self,
+        x_points=None,
+        y_points=None,
+        n_buckets=None,
+        ring_offsets=None,
+        half_open=False,
+    ):
+        self.half_open = half_open
+        if x_points is None:
+            # empty instance, filled by load()
+            return
+        self.x1, self.y1, self.x2, self.y2 = build_edges(
+            x_points, y_points, ring_offsets
+        )
+        x_min = np.minimum(self.x1, self.x2)
+        x_max = np.maximum(self.x1, self.x2)
+
+        if n_buckets is None:
+            n_buckets = max(1, len(self.x1) // 4)
+        self.x_start = float(x_min.min())
+        width = float(x_max.max()) - self.x_start
+        self.bucket_width = width / n_buckets if width > 0 else 1.0
+        self.n_buckets = n_buckets
+
+        # edge i is listed in the buckets first[i]..last[i]
+        first = self._bucket(x_min)
+        last = self._bucket(x_max)
+        spans = last - first + 1
+        edge_ids = np.repeat(np.arange(len(self.x1)), spans)
+        buckets = np.repeat(first, spans) + (
+            np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        )
+        order = np.argsort(buckets, kind="stable")
+        self.bucket_edges = edge_ids[order]
+        self.bucket_offsets = np.zeros(n_buckets + 1, dtype=np.intp)
+        np.cumsum(
+            np.bincount(buckets, minlength=n_buckets), out=self.bucket_offsets[1:]
+        )
+
+    def _bucket(self, x):
+        bucket = np.floor(
+            (np.asarray(x, dtype=float) - self.x_start) / self.bucket_width
+        )
+        return np.clip(bucket, 0, self.n_buckets - 1).astype(np.intp)
+
+    def ys_at_many(self, xs):
+        """
+        Intersections of many vertical lines.
+
+        Parameters:
+        -----------
+        xs : list or array-like
+            X values of the vertical lines
+
+        Returns:
+        --------
+        tuple
+            (offsets, ys) - CSR-style pair, as intersect_scanlines returns
+        """
+        xs = np.asarray(xs, dtype=float)
+        buckets = self._bucket(xs)
+        starts = self.bucket_offsets[buckets]
+        sizes = self.bucket_offsets[buckets + 1] - starts
+        count("segments_tested", int(sizes.sum()))
+
+        # candidate (line, edge) pairs: every edge of the bucket of each line
+        lines = np.repeat(np.arange(len(xs)), sizes)
+        position = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        edges = self.bucket_edges[np.repeat(starts, sizes) + position]
+        x_line = xs[lines]
+
+        x1, x2 = self.x1[edges], self.x2[edges]
+        inside = _span_mask(
+            x_line, np.minimum(x1, x2), np.maximum(x1, x2), self.half_open
+        )
+        lines, ys = _intersections(
+            lines[inside],
+            edges[inside],
+            x_line[inside],
+            self.x1,
+            self.y1,
+            self.x2,
+            self.y2,
+            unique=not self.half_open,
+        )
+        return _to_csr(len(xs), lines, ys)
+
+    def ys_at(self, x):
+        """
+        Intersections of the vertical line at x, as a list of (x, y) tuples
+        sorted by decreasing y (same format as find_all_y_for_x).
+        """
+        _, ys = self.ys_at_many([x])
+        return [(x, y) for y in ys.tolist()]
+
+    def save(self, path):
+        """Save the index arrays to a .npz file."""
+        np.savez(
+            path,
+            edges=np.stack((self.x1, self.y1, self.x2, self.y2)),
+            bucket_edges=self.bucket_edges,
+            bucket_offsets=self.bucket_offsets,
+            grid=np.array([self.x_start, self.bucket_width]),
+            half_open=self.half_open,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Rebuild an index saved with save() without recomputing the buckets."""
+        index = cls()
+        with np.load(path) as data:
+            index.x1, index.y1, index.x2, index.y2 = data["edges"]
+            index.bucket_edges = data["bucket_edges"]
+            index.bucket_offsets = data["bucket_offsets"]
+            index.x_start, index.bucket_width = data["grid"].tolist()
+            index.half_open = bool(data["half_open"])
+        index.n_buckets = len(index.bucket_offsets) - 1
+        return index
@@ -0,0 +1,276 @@
+# %% [markdown]
+# Level-of-detail rendering of State perimeters and scanlines
+#
+# A perimeter with hundreds of thousands of vertices drawn on an 800 pixel
+# wide axis puts hundreds of vertices in each pixel. decimate_to_pixels keeps
+# only the first and last vertex of every run of consecutive vertices that
+# fall in the same pixel, so the drawn line is the same at that resolution
+# with at most a few vertices per pixel crossed. Runs outside the view
+# collapse into one cell per side, and the segments that enter the view keep
+# their real end points.
+#
+# LODLine keeps the full-resolution arrays and decimates again for the new
+# limits whenever the axis is zoomed or panned. The scanlines between each
+# pair of intersections are drawn as one LineCollection instead of one
+# scatter marker per intersection.
+#
+# render_state draws on a Figure with the Agg canvas, without pyplot or a GUI
+# backend, and writes PNG or SVG (by the extension), so batch jobs can render
+# many States without an interactive session:
+#
+#   python batchAreas.py --settings states.json --figures figures/
+#
+
+# %%
+import numpy as np
+
+# %% [markdown]
+# Decimation
+#
+
+
+# %%
+def decimate_to_pixels(x, y, x_limits, y_limits, width_px, height_px):
+    """
+    Drop the vertices that do not change the line at the given resolution.
+
+    Parameters:
+    -----------
+    x : array-like
+        X coordinates of the line; NaN separates rings and is always kept
+    y : array-like
+        Y coordinates of the line
+    x_limits : tuple
+        (min, max) of the visible x range
+    y_limits : tuple
+        (min, max) of the visible y range
+    width_px : int
+        Width of the axis in pixels
+    height_px : int
+        Height of the axis in pixels
+
+    Returns:
+    --------
+    tuple
+        (x, y) - NumPy arrays with the kept vertices
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 3:
+        return x, y
+
+    pixel_x = (x_limits[1] - x_limits[0]) / max(width_px, 1)
+    pixel_y = (y_limits[1] - y_limits[0]) / max(height_px, 1)
+    with np.errstate(invalid="ignore"):
+        # one cell per pixel, plus one cell on each side of the view
+        column = np.clip(np.floor((x - x_limits[0]) / pixel_x), -1, width_px)
+        row = np.clip(np.floor((y - y_limits[0]) / pixel_y), -1, height_px)
+    cell = column * (height_px + 2) + row
+
+    gap = np.isnan(cell)
+    changes = np.ones(len(x), dtype=bool)
+    changes[1:] = cell[1:] != cell[:-1]
+    # first and last vertex of each run of the same cell, and the NaN gaps
+    keep = changes | np.append(changes[1:], True) | gap
+    return x[keep], y[keep]
+
+
+def scanline_segments(x_interval, y_interval) -> np.ndarray:
+    """
+    Segments between consecutive pairs of intersections of each vertical line,
+    the spans counted by calculate_total_distance.
+
+    Returns:
+    --------
+    np.ndarray
+        (segments x 2 x 2) array for matplotlib.collections.LineCollection
+    """
+    x = np.asarray(x_interval, dtype=float)
+    y = np.asarray(y_interval, dtype=float)
+    if len(x) < 2:
+        return np.zeros((0, 2, 2))
+
+    # position of each point inside its own vertical line
+    starts = np.flatnonzero(np.append(True, x[1:] != x[:-1]))
+    lengths = np.diff(np.append(starts, len(x)))
+    rank = np.arange(len(x)) - np.repeat(starts, lengths)
+    first = np.flatnonzero((rank % 2 == 0)[:-1] & (x[1:] == x[:-1]))
+    return np.stack(
+        (
+            np.column_stack((x[first], y[first])),
+            np.column_stack((x[first], y[first + 1])),
+        ),
+        axis=1,
+    )
+
+
+def with_ring_gaps(x, y, ring_offsets=None):
+    """Insert NaN between rings so each ring is drawn as its own line."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if ring_offsets is not None and len(ring_offsets) > 2:
+        x = np.insert(x, ring_offsets[1:-1], np.nan)
+        y = np.insert(y, ring_offsets[1:-1], np.nan)
+    return x, y
+
+
+# %% [markdown]
+# Zoom-aware line
+#
+
+
+# %%
+class LODLine:
+    """
+    Line2D that shows a decimated copy of a long line and decimates it again
+    for the new view whenever the axis limits change.
+
+    Parameters:
+    -----------
+    ax : matplotlib.axes.Axes
+        Axis to draw on
+    x : array-like
+        Full-resolution X coordinates (NaN between rings)
+    y : array-like
+        Full-resolution Y coordinates
+    **line_options
+        Passed to ax.plot
+    """
+
+    def __init__(self, ax, x, y, **line_options):
+        self.ax = ax
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        (self.line,) = ax.plot(self.x, self.y, **line_options)
+        ax.callbacks.connect("xlim_changed", self.update)
+        ax.callbacks.connect("ylim_changed", self.update)
+        self.update(ax)
+
+    def update(self, ax=None):
+        bbox = self.ax.get_window_extent()
+        x_decimated, y_decimated = decimate_to_pixels(
+            self.x,
+            self.y,
+            self.ax.get_xlim(),
+            self.ax.get_ylim(),
+            int(np.ceil(bbox.width)),
+            int(np.ceil(bbox.height)),
+        )
+        self.line.set_data(x_decimated, y_decimated)
+
+    @property
+    def vertices(self) -> int:
+        """Number of vertices currently drawn."""
+        return len(self.line.get_xdata())
+
+
+# %% [markdown]
+# Drawing
+#
+
+
+# %%
+def draw_state(
+    ax,
+    x,
+    y,
+    x_interval=None,
+    y_interval=None,
+    ring_offsets=None,
+    label=None,
+    linewidth=2,
+    line_color="#2E86AB",
+    scanline_color="red",
+    scanline_width=1.0,
+    scanline_alpha=0.6,
+):
+    """
+    Draw the perimeter (decimated, LODLine) and the scanline spans
+    (one LineCollection) on ax.
+
+    Returns:
+    --------
+    tuple
+        (lod_line, scanlines) - the LODLine and the LineCollection (or None)
+    """
+    from matplotlib.collections import LineCollection
+
+    x, y = with_ring_gaps(x, y, ring_offsets)
+    # scanlines over the grid, perimeter over the scanlines
+    lod_line = LODLine(
+        ax, x, y, linewidth=linewidth, color=line_color, label=label, zorder=3
+    )
+
+    scanlines = None
+    if x_interval is not None and y_interval is not None:
+        segments = scanline_segments(x_interval, y_interval)
+        scanlines = LineCollection(
+            segments,
+            colors=scanline_color,
+            linewidths=scanline_width,
+            alpha=scanline_alpha,
+            label="Scanlines",
+            zorder=2.6,
+        )
+        ax.add_collection(scanlines)
+    return lod_line, scanlines
+
+
+def render_state(
+    path,
+    x,
+    y,
+    x_interval=None,
+    y_interval=None,
+    ring_offsets=None,
+    title=None,
+    figsize=(10, 8),
+    dpi=100,
+    **draw_options,
+):
+    """
+    Render a State to a PNG or SVG file (format from the extension) with the
+    Agg canvas, without pyplot or an interactive backend.
+
+    Parameters:
+    -----------
+    path : str
+        Output file, e.g. "figures/amazonas.png" or "figures/amazonas.svg"
+    x, y : array-like
+        Perimeter coordinates
+    x_interval, y_interval : array-like, optional
+        Intersection points, drawn as scanline spans
+    ring_offsets : list, optional
+        Ring boundaries of a multi-ring geometry
+    title : str, optional
+        Figure title
+    figsize : tuple, optional
+        (width, height) in inches (default: (10, 8))
+    dpi : int, optional
+        Resolution, also the resolution of the decimation (default: 100)
+    **draw_options
+        Passed to draw_state
+
+    Returns:
+    --------
+    int
+        Number of perimeter vertices drawn
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    ax.set_aspect(1)
+    lod_line, _ = draw_state(
+        ax, x, y, x_interval, y_interval, ring_offsets, label=title, **draw_options
+    )
+    ax.grid(True, linestyle="-", linewidth=0.7, alpha=0.7)
+    if title:
+        ax.set_title(title, fontsize=14, fontweight="bold")
+    figure.tight_layout()
+    # the final axis size is known after the layout
+    lod_line.update()
+    figure.savefig(path)
+    return lod_line.vertices
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from areaCalculator import AreaCalculator
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+
+# rings in km: 10 x 10 square, 4 x 4 hole, diamond island inside the hole
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+HOLE = [(3, 3), (3, 7), (7, 7), (7, 3), (3, 3)]
+ISLAND = [(5, 3), (7, 5), (5, 7), (3, 5), (5, 3)]
+
+
+def calculator(*rings):
+    coordinates = np.array([point for ring in rings for point in ring]) * 1000.0
+    ring_offsets = np.cumsum([0, *(len(ring) for ring in rings)])
+    return AreaCalculator(coordinates, ring_offsets)
+
+
+def test_adaptive_area_of_a_square_with_vertical_edges_at_the_ends():
+    result = calculator(SQUARE).adaptive_area(tol=1e-6)
+    assert result["area_km2_Simpson"] == pytest.approx(100.0, abs=1e-9)
+    assert result["area_km2_trapezoid"] == pytest.approx(100.0, abs=1e-9)
+    assert result["converged"]
+
+
+@pytest.mark.parametrize("step_x", [0.5, 1.0])
+def test_adaptive_area_with_a_hole_and_an_island(step_x):
+    # the hole's vertical edges are jumps of the profile
+    result = calculator(SQUARE, HOLE, ISLAND).adaptive_area(tol=1e-9, step_x=step_x)
+    assert result["area_km2_Simpson"] == pytest.approx(92.0, abs=1e-9)
+    assert result["area_km2_trapezoid"] == pytest.approx(92.0, abs=1e-9)
+    assert result["converged"]
+
+
+@pytest.mark.parametrize("tol", [10.0, 1.0])
+def test_adaptive_area_of_a_state_within_tol(tol):
+    state = AreaCalculator.from_geojson(
+        DATA_DIR / "amazonasEPSG31983.geojson",
+        use_cache=False,
+        offset_x=-1.75e6,
+        offset_y=0.95e7,
+        weight=1e5,
+    )
+    result = state.adaptive_area(tol=tol)
+    error = abs(result["area_km2_Simpson"] - state.reference_area() / 1e6)
+    assert result["converged"]
+    assert error <= tol
+
+
+def test_constructor_does_not_freeze_the_callers_array():
+    coordinates = np.array(SQUARE, dtype=float) * 1000
+    state = AreaCalculator(coordinates)
+    coordinates[0, 0] = 1.0
+    assert state.coordinates[0, 0] == 0.0
+    assert not state.coordinates.flags.writeable
+
+
+@pytest.mark.parametrize("weight", [1e3, 1e4, 3e4])
+@pytest.mark.parametrize("step_x", [0.5, 0.3, 0.03, 1e-4])
+def test_default_lines_cover_the_bounding_box(weight, step_x):
+    rng = np.random.default_rng(int(weight))
+    for _ in range(20):
+        points = rng.uniform(-1e4, 1e4, (4, 2))
+        state = AreaCalculator(np.vstack((points, points[:1])), weight=weight)
+        x, _ = state.normalized()
+        x_targets = state.x_targets(step_x)
+        assert x_targets[0] <= x.min()
+        assert x_targets[-1] >= x.max()
+        assert np.allclose(np.diff(x_targets), step_x)
+
+
+def test_x_targets_rejects_a_non_positive_step():
+    with pytest.raises(ValueError):
+        calculator(SQUARE).x_targets(0.0)
+
+
+def test_area_of_the_hole_and_island_converges_to_polygon_area():
+    state = calculator(SQUARE, HOLE, ISLAND)
+    # the hole and the ends of the square are vertical edges on grid lines,
+    # where the half-open rule takes the value to their right
+    for step_x in (0.01, 0.001):
+        _, _, _, area_km2_Simpson, _, area_km2_reference = state.area(step_x=step_x)
+        assert area_km2_reference == pytest.approx(92.0)
+        assert area_km2_Simpson == pytest.approx(92.0, abs=200 * step_x)
@@ -0,0 +1,67 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from geojsonCache import iter_features, load_rings_cached, read_feature_geometry
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+
+
+def feature(i):
+    return {
+        "type": "Feature",
+        "properties": {"name": f"f{i}, [x]"},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[i, 0.0], [i + 1, 0.0], [i, 1.5e-3], [i, 0.0]]],
+        },
+    }
+
+
+@pytest.fixture
+def collection(tmp_path):
+    path = tmp_path / "collection.geojson"
+    data = {"type": "FeatureCollection", "features": [feature(i) for i in range(20)]}
+    path.write_text(json.dumps(data, indent=1))
+    return path, data["features"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64, 1 << 20])
+def test_iter_features_across_chunk_boundaries(collection, chunk_size):
+    path, features = collection
+    assert list(iter_features(path, chunk_size)) == features
+
+
+def test_iter_features_matches_json_load():
+    path = DATA_DIR / "sergipe.json"
+    with open(path) as f:
+        features = json.load(f)["features"]
+    assert list(iter_features(path, chunk_size=4096)) == features
+
+
+def test_read_feature_geometry(collection):
+    path, features = collection
+    assert read_feature_geometry(path, 7) == features[7]["geometry"]
+    with pytest.raises(IndexError):
+        read_feature_geometry(path, 20)
+
+
+def test_cache_follows_edits(collection, tmp_path):
+    path, _ = collection
+    cache_dir = tmp_path / "cache"
+    coords, ring_offsets = load_rings_cached(path, 3, cache_dir)
+    assert np.array_equal(coords, [[3, 0], [4, 0], [3, 1.5e-3], [3, 0]])
+    assert ring_offsets.tolist() == [0, 4]
+
+    data = {
+        "type": "FeatureCollection",
+        "features": [feature(i + 1) for i in range(20)],
+    }
+    path.write_text(json.dumps(data))
+    status = os.stat(path)
+    os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns + 10**9))
+    coords, _ = load_rings_cached(path, 3, cache_dir)
+    assert coords[0].tolist() == [4, 0]
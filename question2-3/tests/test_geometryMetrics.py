@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from geometryMetrics import geometry_metrics, polygon_area, ring_depths, shapely_area
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+HOLE = [(3, 3), (3, 7), (7, 7), (7, 3), (3, 3)]
+ISLAND = [(5, 3), (7, 5), (5, 7), (3, 5), (5, 3)]
+
+
+def arrays(*rings):
+    coordinates = np.array([point for ring in rings for point in ring], dtype=float)
+    return coordinates, np.cumsum([0, *(len(ring) for ring in rings)])
+
+
+def circle(cx, cy, r, n):
+    t = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    ring = np.column_stack((cx + r * np.cos(t), cy + r * np.sin(t)))
+    return np.vstack((ring, ring[:1]))
+
+
+def test_hole_and_island():
+    coordinates, ring_offsets = arrays(SQUARE, HOLE, ISLAND)
+    assert ring_depths(coordinates, ring_offsets).tolist() == [0, 1, 2]
+    assert polygon_area(coordinates, ring_offsets) == pytest.approx(92.0)
+    metrics = geometry_metrics(coordinates, ring_offsets)
+    assert metrics["area"] == pytest.approx(92.0)
+    assert metrics["centroid"] == pytest.approx((5.0, 5.0))
+
+
+def test_depths_of_nested_and_disjoint_rings():
+    rng = np.random.default_rng(0)
+    rings, expected = [], []
+    for i in range(40):
+        # concentric rings; rings of other groups never touch these
+        for depth, radius in enumerate((4, 3, 2, 1)[: rng.integers(1, 5)]):
+            rings.append(circle(10 * (i % 8), 10 * (i // 8), radius, 7 + depth))
+            expected.append(depth)
+    coordinates, ring_offsets = arrays(*rings)
+    assert ring_depths(coordinates, ring_offsets).tolist() == expected
+    assert polygon_area(coordinates, ring_offsets) == pytest.approx(
+        shapely_area(coordinates, ring_offsets)
+    )
+
+
+def test_many_islands_in_a_large_shell():
+    rng = np.random.default_rng(1)
+    centres = rng.uniform(-500, 500, (500, 2))
+    rings = [circle(0, 0, 1000, 20_000)]
+    rings += [circle(x, y, 1e-3, 8) for x, y in centres]
+    coordinates, ring_offsets = arrays(*rings)
+    depths = ring_depths(coordinates, ring_offsets)
+    assert depths[0] == 0
+    assert np.all(depths[1:] == 1)
@@ -0,0 +1,102 @@
+import math
+
+import pytest
+
+from integrationsMethods import (
+    func,
+    func_array,
+    result_I_adaptive_Simpson,
+    result_I_composite_Gauss_Legendre,
+    result_I_Gauss_Legendre,
+    result_I_Romberg,
+    result_I_trapezoid_and_Simpson_with_y_list,
+    result_I_trapezoid_with_y_list,
+)
+
+# integral of func over [0, 1] (60-point Gauss-Legendre)
+I_REF = 0.2599412220542979
+
+
+def uniform_Simpson(expression, n):
+    h = 1 / n
+    total = expression(0) + expression(1)
+    total += sum((4 if i % 2 else 2) * expression(i * h) for i in range(1, n))
+    return total * h / 3
+
+
+def uniform_trapezoid(expression, n):
+    h = 1 / n
+    total = (expression(0) + expression(1)) / 2
+    total += sum(expression(i * h) for i in range(1, n))
+    return total * h
+
+
+def test_adaptive_Simpson_needs_fewer_evaluations_than_uniform():
+    tol = 1e-10
+    value, error_estimate, evaluations = result_I_adaptive_Simpson(func, (0, 1), tol)
+    assert abs(value - I_REF) <= tol
+    assert error_estimate <= tol
+
+    # smallest uniform grid that reaches the same tol
+    n = next(
+        n for n in range(2, 10_000, 2) if abs(uniform_Simpson(func, n) - I_REF) <= tol
+    )
+    assert evaluations < (n + 1) / 2
+
+
+def test_adaptive_Simpson_meets_tol_on_a_singular_derivative():
+    value, _, _ = result_I_adaptive_Simpson(math.sqrt, (0, 1), 1e-8)
+    assert value == pytest.approx(2 / 3, abs=1e-8)
+
+
+def test_adaptive_Simpson_is_exact_for_cubics():
+    value, error_estimate, evaluations = result_I_adaptive_Simpson(
+        lambda x: x**3, (0, 2), 1e-8
+    )
+    assert value == pytest.approx(4.0, abs=1e-14)
+    assert error_estimate == pytest.approx(0.0, abs=1e-14)
+    assert evaluations == 9
+
+
+def test_trapezoid_with_y_list_matches_the_single_pass_rule():
+    y = [func(i / 10) for i in range(11)]
+    I_trapezoid, _, _ = result_I_trapezoid_and_Simpson_with_y_list(y, 0.1)
+    assert result_I_trapezoid_with_y_list(y, 0.1) == pytest.approx(I_trapezoid)
+    # exact for a straight line
+    assert result_I_trapezoid_with_y_list([0, 1, 2, 3], 1) == pytest.approx(4.5)
+
+
+def test_Romberg_reaches_the_reference_with_few_evaluations():
+    value, p, table, evaluations = result_I_Romberg(func_array, (0, 1), levels=6)
+    assert value == pytest.approx(I_REF, abs=1e-12)
+    assert evaluations == 33
+    # calculate_p returns ln of the error ratio, 2^2 - 1 = 3 for the trapezoid
+    assert p == pytest.approx(math.log(3), abs=1e-3)
+    # the trapezoid column is the trapezoid rule of each level
+    assert table[3][0] == pytest.approx(uniform_trapezoid(func, 8), abs=1e-15)
+
+
+def test_Romberg_stops_at_tol_and_is_exact_for_polynomials():
+    value, _, table, _ = result_I_Romberg(
+        lambda x: 5 * x**4 - 3 * x**2, (0, 2), levels=20, tol=1e-12
+    )
+    assert value == pytest.approx(24.0, abs=1e-12)
+    assert len(table) < 20
+
+
+def test_Gauss_Legendre_reaches_the_reference():
+    assert result_I_Gauss_Legendre(func, (0, 1), order=10) == pytest.approx(
+        I_REF, abs=1e-14
+    )
+
+
+@pytest.mark.parametrize("order", [1, 2, 3, 5, 8])
+def test_Gauss_Legendre_is_exact_up_to_degree_2_order_minus_1(order):
+    degree = 2 * order - 1
+    value = result_I_Gauss_Legendre(lambda x: (degree + 1) * x**degree, (0, 1), order)
+    assert value == pytest.approx(1.0, abs=1e-13)
+
+
+def test_composite_Gauss_Legendre_of_sin():
+    value = result_I_composite_Gauss_Legendre(math.sin, (0, math.pi), n=4, order=5)
+    assert value == pytest.approx(2.0, abs=1e-10)
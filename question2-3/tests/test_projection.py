@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from geojsonCache import geometry_to_arrays, read_feature_geometry
+from projection import convert_file, lonlat_to_utm, project_coordinates
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_central_meridian_on_the_equator():
+    x, y = lonlat_to_utm(np.array([-45.0]), np.array([0.0]))
+    assert x[0] == pytest.approx(500_000.0, abs=1e-9)
+    assert y[0] == pytest.approx(10_000_000.0, abs=1e-9)
+
+
+@pytest.mark.parametrize("state", ["sergipe", "amazonas"])
+def test_matches_the_bundled_ogr2ogr_output(state):
+    lonlat, ring_offsets = geometry_to_arrays(
+        read_feature_geometry(DATA_DIR / f"{state}.json")
+    )
+    expected, expected_offsets = geometry_to_arrays(
+        read_feature_geometry(DATA_DIR / f"{state}EPSG31983.geojson")
+    )
+    assert ring_offsets.tolist() == expected_offsets.tolist()
+    assert np.abs(project_coordinates(lonlat) - expected).max() < 1e-6
+
+
+def test_convert_file_keeps_every_feature_and_its_properties(tmp_path):
+    source = tmp_path / "source.geojson"
+    features = [
+        {
+            "type": "Feature",
+            "id": name,
+            "properties": {"SIGLA": name, "population": i},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[-45, -10 - i], [-44, -10 - i], [-45, -9 - i]]],
+            },
+        }
+        for i, name in enumerate(["AA", "BB", "CC"])
+    ]
+    features.append(
+        {"type": "Feature", "properties": {"SIGLA": "DD"}, "geometry": None}
+    )
+    source.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+
+    target = tmp_path / "target.geojson"
+    convert_file(source, target)
+    converted = json.loads(target.read_text())
+    assert converted["crs"]["properties"]["name"] == "urn:ogc:def:crs:EPSG::31983"
+    assert [feature.get("id") for feature in converted["features"]] == [
+        "AA",
+        "BB",
+        "CC",
+        None,
+    ]
+    for original, feature in zip(features, converted["features"]):
+        assert feature["properties"] == original["properties"]
+    assert converted["features"][3]["geometry"] is None
+    polygon = converted["features"][1]["geometry"]
+    assert polygon["type"] == "Polygon"
+    expected = project_coordinates(features[1]["geometry"]["coordinates"][0])
+    assert np.allclose(polygon["coordinates"][0], expected, rtol=0, atol=1e-9)
+
+    convert_file(source, target, feature_index=2)
+    converted = json.loads(target.read_text())
+    assert [feature["id"] for feature in converted["features"]] == ["CC"]
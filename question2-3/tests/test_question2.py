@@ -0,0 +1,26 @@
+import pytest
+
+import question2
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    # result() reads the settings the __main__ block sets
+    monkeypatch.setattr(question2, "state_name", "Sergipe", raising=False)
+    monkeypatch.setattr(question2, "area_oficial_km2", 21_910.0, raising=False)
+
+
+def test_result_without_reference(settings, capsys):
+    question2.result(22_161.73e6, 22_101.76e6, 22_161.73, 22_101.76, None, None)
+    output = capsys.readouterr().out
+    assert "Método de Simpson" in output
+    assert "referência" not in output
+
+
+def test_result_with_reference(settings, capsys):
+    question2.result(
+        22_161.73e6, 22_101.76e6, 22_161.73, 22_101.76, 22_264.98e6, 22_264.98
+    )
+    output = capsys.readouterr().out
+    assert "Área de referência (fórmula do laço)" in output
+    assert "Diferença entre Simpson e referência" in output
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from geojsonCache import geometry_to_arrays, read_feature_geometry
+from geometryMetrics import polygon_area
+from question2 import find_all_y_for_x
+from scanlineIntersections import (
+    EdgeIndex,
+    calculate_total_distances,
+    csr_to_all_y_in_x,
+    find_all_y_for_x_sweep,
+    intersect_scanlines,
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+HOLE = [(3, 3), (3, 7), (7, 7), (7, 3), (3, 3)]
+ISLAND = [(5, 3), (7, 5), (5, 7), (3, 5), (5, 3)]
+# a second polygon of the MultiPolygon
+TRIANGLE = [(12, 5), (16, 2), (15, 9), (12, 5)]
+
+
+def arrays(*rings):
+    coordinates = np.array([point for ring in rings for point in ring], dtype=float)
+    return coordinates, np.cumsum([0, *(len(ring) for ring in rings)])
+
+
+def engines(x_targets, x, y, ring_offsets=None, half_open=False):
+    """all_y_in_x of the sweep, NumPy and EdgeIndex engines."""
+    x_targets = list(x_targets)
+    sweep = find_all_y_for_x_sweep(x_targets, x, y, ring_offsets, half_open)
+    numpy = csr_to_all_y_in_x(
+        x_targets,
+        *intersect_scanlines(
+            x_targets, x, y, ring_offsets=ring_offsets, half_open=half_open
+        ),
+    )
+    index = EdgeIndex(x, y, ring_offsets=ring_offsets, half_open=half_open)
+    indexed = csr_to_all_y_in_x(x_targets, *index.ys_at_many(x_targets))
+    return sweep, numpy, indexed
+
+
+@pytest.mark.parametrize("state", ["sergipe", "amazonas"])
+def test_engines_match_the_scan_on_the_bundled_states(state):
+    coordinates, _ = geometry_to_arrays(
+        read_feature_geometry(DATA_DIR / f"{state}EPSG31983.geojson")
+    )
+    x = (coordinates[:, 0] - coordinates[:, 0].mean()) / 1e4
+    y = (coordinates[:, 1] - coordinates[:, 1].mean()) / 1e4
+    # a grid plus lines through vertices
+    x_targets = np.concatenate((np.linspace(x.min(), x.max(), 200), x[::7]))
+    scan = [find_all_y_for_x(x_target, x, y) for x_target in x_targets]
+    for result in engines(x_targets, x, y):
+        assert result == scan
+
+
+def test_half_open_rule_with_holes_islands_and_several_polygons():
+    coordinates, ring_offsets = arrays(SQUARE, HOLE, ISLAND, TRIANGLE)
+    x, y = coordinates[:, 0], coordinates[:, 1]
+    vertices_x = np.unique(x)
+
+    # every line, including those through vertices, crosses an even number
+    # of times, and the three engines agree
+    x_targets = np.concatenate((vertices_x, np.linspace(-1, 17, 181)))
+    sweep, numpy, indexed = engines(x_targets, x, y, ring_offsets, half_open=True)
+    assert numpy == sweep
+    assert indexed == sweep
+    assert all(len(line) % 2 == 0 for line in sweep)
+
+    # the profile is linear between vertex abscissas, so the midpoint rule
+    # on those intervals is exact
+    middles = (vertices_x[:-1] + vertices_x[1:]) / 2
+    offsets, ys = intersect_scanlines(
+        middles, x, y, ring_offsets=ring_offsets, half_open=True
+    )
+    area = np.sum(np.diff(vertices_x) * calculate_total_distances(offsets, ys))
+    assert area == pytest.approx(polygon_area(coordinates, ring_offsets))
+    assert area == pytest.approx(92.0 + 12.5)
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from geojsonCache import geometry_to_arrays, read_feature_geometry
+from geometryMetrics import ring_signed_areas
+from simplification import MIN_RING_VERTICES, simplify_rings
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+
+
+def noisy_ring(cx, cy, radius, n, clockwise, rng):
+    t = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    if clockwise:
+        t = -t
+    r = radius * (1 + 0.02 * rng.standard_normal(n))
+    ring = np.column_stack((cx + r * np.cos(t), cy + r * np.sin(t)))
+    return np.vstack((ring, ring[:1]))
+
+
+def rings():
+    rng = np.random.default_rng(0)
+    shell = noisy_ring(0, 0, 100, 2000, False, rng)
+    hole = noisy_ring(0, 0, 40, 500, True, rng)
+    islet = noisy_ring(300, 0, 5, 12, False, rng)
+    coordinates = np.vstack((shell, hole, islet))
+    return coordinates, np.cumsum([0, len(shell), len(hole), len(islet)])
+
+
+def check(coordinates, ring_offsets, max_area):
+    keep, new_offsets, report = simplify_rings(
+        coordinates[:, 0], coordinates[:, 1], ring_offsets, max_area
+    )
+    before = np.abs(ring_signed_areas(coordinates, ring_offsets))
+    after = np.abs(ring_signed_areas(coordinates[keep], new_offsets))
+    # exact area change, and the bound covers each ring
+    assert report["area_delta"] == pytest.approx(
+        after.sum() - before.sum(), rel=1e-9, abs=1e-9 * before.sum()
+    )
+    assert np.all(np.abs(after - before) <= report["area_change_bound"] * (1 + 1e-9))
+    assert report["vertices_removed"] == len(keep) - keep.sum() > 0
+    # the closing pair and a minimum of vertices stay in every ring
+    for start, end in zip(ring_offsets[:-1], ring_offsets[1:]):
+        assert keep[start] and keep[end - 1]
+    assert np.all(np.diff(new_offsets) >= MIN_RING_VERTICES)
+    return keep
+
+
+@pytest.mark.parametrize("max_area", [1.0, 50.0, 1e4])
+def test_area_delta_is_the_exact_change_with_holes_and_small_rings(max_area):
+    check(*rings(), max_area)
+
+
+def test_area_delta_on_a_state():
+    coordinates, ring_offsets = geometry_to_arrays(
+        read_feature_geometry(DATA_DIR / "amazonasEPSG31983.geojson")
+    )
+    check(coordinates, ring_offsets, 1e6)
+
+
+def test_zero_tolerance_keeps_everything():
+    coordinates, ring_offsets = rings()
+    keep, new_offsets, report = simplify_rings(
+        coordinates[:, 0], coordinates[:, 1], ring_offsets, 0.0
+    )
+    assert keep.all()
+    assert new_offsets.tolist() == list(ring_offsets)
+    assert report["area_delta"] == 0.0